@@ -0,0 +1,26 @@
+import torch
+import torch.nn as nn
+
+# Imported on first use by core.ml, so torch only loads once a model is trained or restored
+
+
+class Autoencoder(nn.Module):
+    def __init__(self, input_dim: int, latent_dim: int = 10):
+        super(Autoencoder, self).__init__()
+        self.encoder = nn.Sequential(
+            nn.Linear(input_dim, 32),
+            nn.ReLU(),
+            nn.Linear(32, latent_dim),
+            nn.ReLU()
+        )
+        self.decoder = nn.Sequential(
+            nn.Linear(latent_dim, 32),
+            nn.ReLU(),
+            nn.Linear(32, input_dim),
+            nn.Sigmoid() # Assuming normalized input [0,1]
+        )
+
+    def forward(self, x):
+        encoded = self.encoder(x)
+        decoded = self.decoder(encoded)
+        return decoded
@@ -0,0 +1,116 @@
+import numpy as np
+from typing import Optional
+
+
+class RingBuffer:
+    """
+    Fixed-capacity FIFO of feature rows in one preallocated array.
+    Every row is written twice (at i and i + capacity), so the window in chronological
+    order is always one contiguous slice: view() is zero-copy and appends never reallocate.
+    """
+
+    def __init__(self, capacity: int, n_features: int, dtype=np.float64):
+        """
+        :param capacity: Maximum number of rows (the window size)
+        :param n_features: Columns per row
+        :param dtype: Storage dtype (float64 or float32)
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.n_features = n_features
+        self._data = np.zeros((2 * capacity, n_features), dtype=dtype)
+        self._head = 0  # Next write position in [0, capacity)
+        self._count = 0
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        return iter(self.view())
+
+    def __array__(self, dtype=None, copy=None):
+        # np.array(buffer) keeps working and returns an owned, ordered copy
+        return np.array(self.view(), dtype=dtype)
+
+    def append(self, row):
+        self._data[self._head] = row
+        self._data[self._head + self.capacity] = row
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def extend(self, rows):
+        """Append many rows with one vectorized write; only the last `capacity` rows are kept."""
+        rows = np.asarray(rows, dtype=self._data.dtype).reshape(-1, self.n_features)
+        n = len(rows)
+        if n == 0:
+            return
+        skipped = max(0, n - self.capacity)
+        rows = rows[skipped:]
+        positions = (self._head + skipped + np.arange(len(rows))) % self.capacity
+        self._data[positions] = rows
+        self._data[positions + self.capacity] = rows
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+
+    def view(self) -> np.ndarray:
+        """Rows oldest to newest, as a read-only view into the buffer (zero-copy)."""
+        start = (self._head - self._count) % self.capacity
+        view = self._data[start:start + self._count]
+        view.flags.writeable = False
+        return view
+
+    def last(self, n: int) -> np.ndarray:
+        """The newest n rows (read-only view)."""
+        return self.view()[max(0, self._count - n):]
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+
+class JitterPool:
+    """
+    Pre-drawn Gaussian noise handed out sequentially, refilled one block at a time,
+    instead of one np.random.normal call per event.
+    Seeded, so the n-th draw only depends on the seed and n: whether the draws are taken one
+    at a time or in batches, a stream replayed from its start gets the same jitter again
+    (and so the same point clouds and diagram cache keys). Equal windows at other stream
+    positions get different jitter and miss the cache; that is the price of keeping repeated
+    values apart in the point cloud, which a jitter derived from the value would collapse.
+    """
+
+    def __init__(self, scale: float = 0.1, block_size: int = 4096, seed: Optional[int] = None):
+        self.scale = scale
+        self.block_size = block_size
+        self._rng = np.random.default_rng(seed)
+        self._block = self._rng.normal(0.0, scale, block_size)
+        self._pos = 0
+
+    def next(self) -> float:
+        if self._pos >= self.block_size:
+            self._refill()
+        value = self._block[self._pos]
+        self._pos += 1
+        return float(value)
+
+    def draw(self, n: int) -> np.ndarray:
+        """n samples as an array (may span several blocks)."""
+        out = np.empty(n)
+        filled = 0
+        while filled < n:
+            if self._pos >= self.block_size:
+                self._refill()
+            take = min(n - filled, self.block_size - self._pos)
+            out[filled:filled + take] = self._block[self._pos:self._pos + take]
+            self._pos += take
+            filled += take
+        return out
+
+    def _refill(self):
+        self._block = self._rng.normal(0.0, self.scale, self.block_size)
+        self._pos = 0
@@ -0,0 +1,115 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+logger = logging.getLogger("topoforge.cache")
+
+# Rough per-entry bookkeeping overhead (key, dicts, list of arrays)
+ENTRY_OVERHEAD_BYTES = 512
+
+
+class _CacheEntry:
+    __slots__ = ("diagrams", "meta", "features", "nbytes")
+
+    def __init__(self, diagrams, meta: Dict[str, Any]):
+        self.diagrams = diagrams
+        self.meta = meta
+        self.features: Dict[Hashable, Any] = {}
+        self.nbytes = ENTRY_OVERHEAD_BYTES + sum(np.asarray(dgm).nbytes for dgm in diagrams)
+
+
+class DiagramCache:
+    """
+    Content-addressed LRU cache for persistence diagrams.
+    Entries are keyed by a BLAKE2b digest of the window bytes plus the computation
+    parameters, and evicted least-recently-used first once either the entry count or
+    the diagram memory exceeds its bound. Derived features (Betti numbers, entropy,
+    landscapes, ...) are memoized on the entry and evicted with it.
+    A single instance can be shared by several analyzers; all methods are thread-safe.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        """
+        :param max_entries: Maximum number of cached windows
+        :param max_bytes: Maximum memory held by cached diagrams
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        # id() of a cached diagrams list -> key, to find memoized features from the diagrams alone
+        self._keys_by_id: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(data: np.ndarray, **params) -> str:
+        """Digest of the window contents, shape, dtype and computation parameters."""
+        data = np.ascontiguousarray(data)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{data.shape}|{data.dtype.str}|{sorted(params.items())}".encode())
+        digest.update(memoryview(data).cast("B"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[_CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, diagrams, meta: Optional[Dict[str, Any]] = None) -> _CacheEntry:
+        entry = _CacheEntry(diagrams, meta or {})
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._keys_by_id[id(diagrams)] = key
+            self.nbytes += entry.nbytes
+            while self._entries and (len(self._entries) > self.max_entries or self.nbytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return entry
+
+    def features(self, diagrams) -> Optional[Dict[Hashable, Any]]:
+        """Memoized feature dict of a cached diagrams object, or None if it is not cached."""
+        with self._lock:
+            key = self._keys_by_id.get(id(diagrams))
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None or entry.diagrams is not diagrams:
+                return None
+            return entry.features
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_id.clear()
+            self.nbytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        self._keys_by_id.pop(id(entry.diagrams), None)
+        self.nbytes -= entry.nbytes
@@ -0,0 +1,91 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("topoforge.executor")
+
+
+class AnalysisOverloaded(Exception):
+    """Raised when the analysis stage is at capacity and the work item is rejected."""
+
+
+class AnalysisExecutor:
+    """
+    Runs CPU-heavy window analysis off the event loop with bounded concurrency.
+    At most max_concurrency items run at once; up to max_queue more wait for a slot.
+    Anything beyond that is rejected with AnalysisOverloaded, so callers get explicit
+    backpressure instead of an ever-growing backlog.
+    """
+    KINDS = ("thread", "process")
+
+    def __init__(self, kind: str = "thread", max_workers: int = 2,
+                 max_concurrency: Optional[int] = None, max_queue: int = 32):
+        """
+        :param kind: "thread" runs whole analyses in a thread pool; "process" ships picklable
+                     work (persistence computation) to a process pool
+        :param max_workers: Pool size
+        :param max_concurrency: Items allowed to run at once (defaults to max_workers)
+        :param max_queue: Items allowed to wait for a slot; 0 rejects as soon as all slots are busy
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown executor kind '{kind}', expected one of {self.KINDS}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self.max_queue = max_queue
+        pool = ThreadPoolExecutor if kind == "thread" else ProcessPoolExecutor
+        self._pool = pool(max_workers=max_workers)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) in the pool.
+        :raises AnalysisOverloaded: if the running and queued items are already at capacity
+        """
+        if self.pending >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            raise AnalysisOverloaded(
+                f"Analysis stage at capacity ({self.pending} pending, limit {self.max_concurrency + self.max_queue})"
+            )
+
+        self.pending += 1
+        try:
+            async with self._slots:
+                self.running += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+                except Exception:
+                    self.failed += 1
+                    raise
+                finally:
+                    self.running -= 1
+            self.completed += 1
+            return result
+        finally:
+            self.pending -= 1
+
+    @property
+    def queue_depth(self) -> int:
+        """Items waiting for a slot."""
+        return self.pending - self.running
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "running": self.running,
+            "queued": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failed": self.failed
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,120 @@
+import numpy as np
+from typing import Any
+
+
+def average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Expected path length of an unsuccessful BST search among n samples (the c(n) of Isolation Forest)."""
+    n = np.asarray(n_samples, dtype=float)
+    length = np.zeros_like(n)
+    length[n == 2] = 1.0
+    many = n > 2
+    length[many] = 2.0 * (np.log(n[many] - 1.0) + np.euler_gamma) - 2.0 * (n[many] - 1.0) / n[many]
+    return length
+
+
+class CompiledForest:
+    """
+    A fitted sklearn IsolationForest flattened into packed node arrays.
+
+    All trees share one set of arrays (feature, threshold, left, right, leaf path length),
+    indexed by global node id. Leaves point to themselves, so scoring is a fixed number
+    of vectorized steps over a (points, trees) matrix of node ids, with no per-estimator
+    Python dispatch and no input validation. Matches IsolationForest.decision_function:
+    inputs are cast to float32 like sklearn's trees do, and estimators trained on a
+    feature subset read their columns through estimators_features_.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 path_length: np.ndarray, roots: np.ndarray, max_depth: int, n_features: int,
+                 normalizer: float, offset: float):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.path_length = path_length
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.normalizer = normalizer
+        self.offset = offset
+
+    @classmethod
+    def from_sklearn(cls, forest: Any) -> "CompiledForest":
+        """Export a fitted sklearn.ensemble.IsolationForest."""
+        n_features = forest.n_features_in_
+        # Estimators only see a column subset when bagging subsampled the features
+        max_features = getattr(forest, "_max_features", n_features)
+        remap = getattr(forest, "bootstrap_features", False) or max_features != n_features
+
+        features, thresholds, lefts, rights, path_lengths, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for estimator, columns in zip(forest.estimators_, forest.estimators_features_):
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            left, right = tree.children_left, tree.children_right
+            is_leaf = left < 0
+
+            # Node depths (root = 0); children always come after their parent
+            depth = np.zeros(n_nodes, dtype=np.int64)
+            for node in range(n_nodes):
+                if not is_leaf[node]:
+                    depth[left[node]] = depth[right[node]] = depth[node] + 1
+            max_depth = max(max_depth, int(depth.max()))
+
+            own = np.arange(n_nodes)
+            feature = np.where(is_leaf, 0, tree.feature)
+            if remap:
+                feature = np.asarray(columns)[feature]
+            features.append(feature)
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, own, left) + offset)
+            rights.append(np.where(is_leaf, own, right) + offset)
+            path_lengths.append(np.where(is_leaf, depth + average_path_length(tree.n_node_samples), 0.0))
+            roots.append(offset)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            path_length=np.concatenate(path_lengths),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            n_features=n_features,
+            normalizer=len(forest.estimators_) * float(average_path_length([forest.max_samples_])[0]),
+            offset=float(forest.offset_)
+        )
+
+    def leaves(self, data: np.ndarray) -> np.ndarray:
+        """
+        (n_points, n_trees) global leaf id each point ends up in.
+        :raises ValueError: for NaN or infinite inputs (or values beyond float32); sklearn routes
+                            those through its missing-value rules, which the export does not model
+        """
+        # Same precision as sklearn's trees, which compare float32 inputs to float64 thresholds
+        with np.errstate(over="ignore"):
+            values = np.asarray(data, dtype=np.float32).reshape(-1, self.n_features).astype(np.float64)
+        if not np.isfinite(values).all():
+            # NaN would otherwise silently take the right branch at every split
+            raise ValueError("Input contains NaN or infinity (or a value too large for float32)")
+        flat = values.ravel()
+        row_offset = (np.arange(len(values)) * self.n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (len(values), len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = flat.take(row_offset + self.feature.take(nodes)) <= self.threshold.take(nodes)
+            nodes = np.where(go_left, self.left.take(nodes), self.right.take(nodes))
+        return nodes
+
+    def score_samples(self, data: np.ndarray) -> np.ndarray:
+        """Same as IsolationForest.score_samples: the lower, the more abnormal."""
+        depths = self.path_length.take(self.leaves(data)).sum(axis=1)
+        if self.normalizer == 0:
+            # Single training sample: sklearn fixes the normalized depth at 1
+            return np.full(len(depths), -0.5)
+        return -(2.0 ** (-depths / self.normalizer))
+
+    def decision_function(self, data: np.ndarray) -> np.ndarray:
+        """Same as IsolationForest.decision_function: negative for outliers."""
+        return self.score_samples(data) - self.offset
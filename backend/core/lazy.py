@@ -0,0 +1,131 @@
+"""
+Deferred imports for the heavy ML/TDA libraries (torch, sklearn, ripser, scipy).
+
+    ripser = lazy_import("ripser")      # nothing is imported yet
+    ripser.ripser(points)               # imported here, on first attribute access
+
+Web routes that never touch the pipeline (auth, CRUD) then start without paying for
+them; preload() can warm them up in a background thread after startup instead.
+Every lazy load is timed, and import_report() lists the slowest ones.
+
+    python -m core.lazy core.processor   # -X importtime report of the slowest modules
+"""
+import importlib
+import logging
+import re
+import subprocess
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("topoforge.lazy")
+
+# Module name -> seconds its first (lazy or preloaded) import took
+_load_times: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+class LazyModule(ModuleType):
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = load(self.__name__)
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Proxy for module `name`; the import happens on first use."""
+    return LazyModule(name)
+
+
+def load(name: str) -> ModuleType:
+    """Import `name` now, recording how long it took if this is the first import."""
+    if name in sys.modules:
+        # import_module (rather than sys.modules) waits if another thread is mid-import
+        return importlib.import_module(name)
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = time.perf_counter() - start
+    with _lock:
+        if name in _load_times:
+            return module
+        _load_times[name] = elapsed
+    logger.info(f"Loaded {name} in {elapsed * 1000:.0f} ms")
+    return module
+
+
+def is_loaded(name: str) -> bool:
+    return name in sys.modules
+
+
+def preload(names: Iterable[str], background: bool = True) -> Optional[threading.Thread]:
+    """
+    Import modules ahead of first use. In the background (default) the caller returns
+    immediately and a daemon thread does the imports; failures are logged, not raised.
+    """
+    names = list(names)
+
+    def run():
+        for name in names:
+            try:
+                load(name)
+            except Exception as e:
+                logger.warning(f"Preloading {name} failed: {e}")
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="topoforge-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_report(top: int = 10) -> List[Tuple[str, float]]:
+    """(module, seconds) of lazily loaded modules, slowest first."""
+    with _lock:
+        return sorted(_load_times.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def profile_imports(module: str, top: int = 15) -> List[Tuple[str, float, float]]:
+    """
+    Cold-import `module` in a fresh interpreter with -X importtime.
+    Returns (module, cumulative seconds, self seconds) for the slowest `top` modules.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        if match:
+            rows.append((match.group(4), int(match.group(2)) / 1e6, int(match.group(1)) / 1e6))
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "core.processor"
+    print(f"{'module':<50} {'cumulative':>12} {'self':>10}")
+    for name, cumulative, own in profile_imports(target):
+        print(f"{name:<50} {cumulative * 1000:>10.0f}ms {own * 1000:>8.0f}ms")
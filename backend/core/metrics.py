@@ -0,0 +1,188 @@
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds, 0.1 ms to 10 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and two adds."""
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Iterable[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the bucket holding the q-th observation."""
+        if self.count == 0:
+            return math.nan
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if cumulative + n >= rank and n > 0:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - cumulative) / n
+            cumulative += n
+        return self.bounds[-1]
+
+
+class _StageTimer:
+    __slots__ = ("_histogram", "_lock", "_start")
+
+    def __init__(self, histogram: Histogram, lock: threading.Lock):
+        self._histogram = histogram
+        self._lock = lock
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._start
+        with self._lock:
+            self._histogram.observe(elapsed)
+        return False
+
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms rendered in the Prometheus text format.
+    Metrics are created on first use; gauges owned by other components (cache, executor,
+    ...) are read at scrape time through registered collectors. Thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._help: Dict[str, str] = {}
+        self._bounds: Dict[str, Tuple[float, ...]] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, float, Dict[str, str]]]]] = []
+
+    def describe(self, name: str, help_text: str, buckets: Optional[Iterable[float]] = None):
+        self._help[name] = help_text
+        if buckets is not None:
+            self._bounds[name] = tuple(buckets)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        series = self._histograms.get(name)
+        histogram = series.get(key) if series is not None else None
+        if histogram is None:
+            # Created under the lock so render() never sees the dicts change mid-iteration
+            with self._lock:
+                series = self._histograms.setdefault(name, {})
+                histogram = series.setdefault(key, Histogram(self._bounds.get(name, LATENCY_BUCKETS)))
+        return histogram
+
+    def observe(self, name: str, value: float, **labels):
+        histogram = self.histogram(name, **labels)
+        with self._lock:
+            histogram.observe(value)
+
+    def time(self, name: str, **labels) -> _StageTimer:
+        """Context manager observing the elapsed seconds of its block."""
+        return _StageTimer(self.histogram(name, **labels), self._lock)
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, float, Dict[str, str]]]]):
+        """collector() yields (gauge name, value, labels) at scrape time."""
+        self._collectors.append(collector)
+
+    def quantiles(self, name: str, qs=(0.5, 0.99)) -> Dict[str, Dict[str, float]]:
+        """Estimated quantiles per label set, e.g. {"stage=ml": {"p50": ..., "p99": ...}}."""
+        with self._lock:
+            return {
+                ",".join(f"{k}={v}" for k, v in key) or "all": {
+                    f"p{round(q * 100)}": histogram.quantile(q) for q in qs
+                }
+                for key, histogram in self._histograms.get(name, {}).items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                self._header(lines, name, "counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, "histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, n in zip(histogram.bounds + (math.inf,), histogram.counts):
+                        cumulative += n
+                        le = "+Inf" if bound == math.inf else _number(bound)
+                        lines.append(f"{name}_bucket{_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(histogram.sum)}")
+                    lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+
+        gauges: Dict[str, List[str]] = {}
+        for collector in self._collectors:
+            for name, value, labels in collector():
+                key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+                gauges.setdefault(name, []).append(f"{name}{_labels(key)} {_number(value)}")
+        for name, samples in sorted(gauges.items()):
+            self._header(lines, name, "gauge")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+def _labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    escaped = (k + '="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+               for k, v in key)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _number(value: float) -> str:
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+# Process-wide registry used by the pipeline and served on /metrics
+metrics = MetricsRegistry()
+metrics.describe("topoforge_stage_seconds", "Time spent per pipeline stage")
+metrics.describe("topoforge_request_seconds", "Ingest route latency")
+metrics.describe("topoforge_window_size", "Events per analyzed window", SIZE_BUCKETS)
+metrics.describe("topoforge_analysis_queue_depth", "Analysis executor queue depth seen per window", SIZE_BUCKETS)
+metrics.describe("topoforge_windows_total", "Windows processed, by whether a full evaluation ran")
+metrics.describe("topoforge_anomalies_total", "Windows flagged anomalous")
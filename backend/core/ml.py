@@ -1,70 +1,294 @@
+import copy
+import os
 import numpy as np
-from sklearn.ensemble import IsolationForest
-import torch
-import torch.nn as nn
 import logging
+import warnings
+from typing import Optional, Tuple
+from .lazy import lazy_import
+from .online import HalfSpaceTrees
+from .forest import CompiledForest
 
 logger = logging.getLogger("topoforge.ml")
 
-class Autoencoder(nn.Module):
-    def __init__(self, input_dim: int, latent_dim: int = 10):
-        super(Autoencoder, self).__init__()
-        self.encoder = nn.Sequential(
-            nn.Linear(input_dim, 32),
-            nn.ReLU(),
-            nn.Linear(32, latent_dim),
-            nn.ReLU()
-        )
-        self.decoder = nn.Sequential(
-            nn.Linear(latent_dim, 32),
-            nn.ReLU(),
-            nn.Linear(32, input_dim),
-            nn.Sigmoid() # Assuming normalized input [0,1]
-        )
-
-    def forward(self, x):
-        encoded = self.encoder(x)
-        decoded = self.decoder(encoded)
-        return decoded
+# Heavy dependencies load on first training/restore (see core.lazy)
+torch = lazy_import("torch")
+_ensemble = lazy_import("sklearn.ensemble")
+
+def __getattr__(name):
+    # Autoencoder lives in core.autoencoder so torch is only imported when it is needed
+    if name == "Autoencoder":
+        from .autoencoder import Autoencoder
+        return Autoencoder
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_torch_threads_configured = False
+
+
+def configure_torch_threads(n_threads: Optional[int] = None):
+    """
+    Set torch's intra-op thread pool size (process-wide). 1 suits many small concurrent windows.
+    Defaults to TOPOFORGE_TORCH_THREADS (unset or 0 keeps torch's default). Runs once per process,
+    on the first model build, so it also applies in stream workers.
+    """
+    global _torch_threads_configured
+    if n_threads is None:
+        if _torch_threads_configured:
+            return
+        n_threads = int(os.getenv("TOPOFORGE_TORCH_THREADS", "0"))
+    _torch_threads_configured = True
+    if n_threads > 0:
+        torch.set_num_threads(n_threads)
+
 
 class AnomalyDetector:
-    def __init__(self, input_dim: int = 50):
-        self.iso_forest = IsolationForest(contamination=0.1, random_state=42)
-        self.autoencoder = Autoencoder(input_dim)
+    # Point detectors predict() can serve: the batch-fitted forest or the online half-space trees
+    DETECTORS = ("isolation_forest", "half_space_trees")
+
+    def __init__(self, input_dim: Optional[int] = None, latent_dim: Optional[int] = None,
+                 epochs: int = 30, batch_size: int = 16, learning_rate: float = 1e-2,
+                 error_quantile: float = 0.99, use_autoencoder: bool = True,
+                 detector: str = "isolation_forest", hst_options: Optional[dict] = None):
+        """
+        :param input_dim: Features per row; inferred from the training data if None
+        :param latent_dim: Autoencoder bottleneck width (defaults to input_dim - 1, at least 1)
+        :param epochs: Passes over the calibration window when training the autoencoder
+        :param batch_size: Autoencoder mini-batch size
+        :param learning_rate: Adam learning rate
+        :param error_quantile: Quantile of the calibration reconstruction errors used as the error threshold
+        :param use_autoencoder: Set False to train and serve the Isolation Forest only
+        :param detector: Point detector predict() uses, one of DETECTORS
+        :param hst_options: Forwarded to HalfSpaceTrees (n_trees, depth, window_size, ...)
+        """
+        if detector not in self.DETECTORS:
+            raise ValueError(f"Unknown detector {detector!r}, expected one of {self.DETECTORS}")
+        self.detector = detector
+        # Created on first train(), so building a detector doesn't import sklearn
+        self.iso_forest = None
+        # Packed-array copy of iso_forest used for scoring (see core.forest)
+        self._compiled_forest: Optional[CompiledForest] = None
+        # Online detector, fitted when it is selected; update() keeps it current
+        self.hst_options = dict(hst_options or {})
+        self.hst: Optional[HalfSpaceTrees] = None
+        self.input_dim = input_dim
+        self.latent_dim = latent_dim
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.error_quantile = error_quantile
+        self.use_autoencoder = use_autoencoder
+        self.autoencoder = None
+        self._scripted = None
+        # Min-max scaling fitted on the calibration window (the decoder ends in a sigmoid)
+        self._offset: Optional[np.ndarray] = None
+        self._scale: Optional[np.ndarray] = None
+        self.error_threshold: Optional[float] = None
         self.is_fitted = False
-        
+
+    def _build_autoencoder(self, input_dim: int):
+        from .autoencoder import Autoencoder
+        configure_torch_threads()
+        self.input_dim = input_dim
+        latent_dim = self.latent_dim or max(1, input_dim - 1)
+        self.autoencoder = Autoencoder(input_dim, latent_dim=latent_dim)
+
     def train(self, data: np.ndarray):
         """
         Train the anomaly detection models.
+        Only the selected point detector is fitted; select_detector() fits the other on demand.
         :param data: Normal behavior data
         """
-        logger.info("Training Isolation Forest...")
-        self.iso_forest.fit(data)
-        
-        # TODO: Train Autoencoder
+        self.iso_forest = self.hst = self._compiled_forest = None
+        self._fit_detector(data)
+        if self.use_autoencoder:
+            self._train_autoencoder(np.asarray(data, dtype=np.float32))
         self.is_fitted = True
         logger.info("Training complete.")
 
+    def _fit_detector(self, data: np.ndarray, detector: Optional[str] = None):
+        """Fit `detector` (default: the selected one). Models are fitted first and assigned after."""
+        if (detector or self.detector) == "half_space_trees":
+            logger.info("Fitting Half-Space Trees...")
+            self.hst = HalfSpaceTrees(**self.hst_options).fit(data)
+        else:
+            logger.info("Training Isolation Forest...")
+            iso_forest = _ensemble.IsolationForest(contamination=0.1, random_state=42)
+            iso_forest.fit(data)
+            self.iso_forest = iso_forest
+            self._compile_forest(data)
+
+    def _compile_forest(self, data: Optional[np.ndarray] = None):
+        """Export iso_forest to packed arrays; served only once it reproduces sklearn's scores on `data`."""
+        self._compiled_forest = None
+        if self.iso_forest is None or data is None or len(data) == 0:
+            return
+        try:
+            compiled = CompiledForest.from_sklearn(self.iso_forest)
+            if not np.allclose(compiled.decision_function(data),
+                               self.iso_forest.decision_function(data), rtol=0, atol=1e-9):
+                raise ValueError("scores differ from IsolationForest.decision_function")
+        except Exception as e:
+            logger.warning(f"Forest export failed, scoring through sklearn: {e}")
+            return
+        self._compiled_forest = compiled
+
+    def select_detector(self, detector: str, data: Optional[np.ndarray] = None):
+        """
+        Switch the point detector. If the models are already trained and the newly selected
+        one is not, it is fitted on `data` (e.g. the current window).
+        """
+        if detector not in self.DETECTORS:
+            raise ValueError(f"Unknown detector {detector!r}, expected one of {self.DETECTORS}")
+        fitted = self.hst if detector == "half_space_trees" else self.iso_forest
+        if self.is_fitted and fitted is None:
+            if data is None:
+                raise ValueError(f"{detector} is not fitted yet; pass data to fit it on")
+            # Fitted before it is selected: predict_many may be running in an executor thread
+            self._fit_detector(np.asarray(data), detector)
+        self.detector = detector
+
+    def update(self, data: np.ndarray):
+        """
+        Learn from new points (oldest first). Only the online detector learns; this is a
+        no-op while the Isolation Forest is selected.
+        """
+        if self.detector == "half_space_trees" and self.hst is not None:
+            self.hst.update(data)
+
+    def _train_autoencoder(self, data: np.ndarray):
+        """Mini-batch Adam on the min-max scaled window, then script the model for inference."""
+        if self.autoencoder is None or self.input_dim != data.shape[1]:
+            self._build_autoencoder(data.shape[1])
+        self._offset = data.min(axis=0)
+        self._scale = np.maximum(data.max(axis=0) - self._offset, 1e-6)
+        x = torch.from_numpy((data - self._offset) / self._scale)
+
+        generator = torch.Generator().manual_seed(42)
+        optimizer = torch.optim.Adam(self.autoencoder.parameters(), lr=self.learning_rate)
+        loss_fn = torch.nn.MSELoss()
+        self.autoencoder.train()
+        for _ in range(self.epochs):
+            for batch in torch.randperm(len(x), generator=generator).split(self.batch_size):
+                optimizer.zero_grad()
+                loss = loss_fn(self.autoencoder(x[batch]), x[batch])
+                loss.backward()
+                optimizer.step()
+        self._script_autoencoder()
+        self.error_threshold = float(np.quantile(self.reconstruction_errors(data), self.error_quantile))
+
+    def _script_autoencoder(self):
+        self.autoencoder.eval()
+        try:
+            with warnings.catch_warnings():
+                # Newer torch releases flag TorchScript as deprecated; it is still the lightest
+                # way to get a graph-optimized CPU module without a compile step per stream
+                warnings.simplefilter("ignore", FutureWarning)
+                self._scripted = torch.jit.script(self.autoencoder)
+        except Exception as e:
+            logger.warning(f"TorchScript compilation failed, serving the eager model: {e}")
+            self._scripted = self.autoencoder
+
+    def reconstruction_errors(self, data: np.ndarray) -> np.ndarray:
+        """Per-row mean squared reconstruction error, from one batched no-grad forward pass."""
+        with np.errstate(over="ignore"):
+            # Values beyond float32 become inf (and infinite errors, see score_window)
+            x = torch.from_numpy((np.asarray(data, dtype=np.float32) - self._offset) / self._scale)
+        with torch.inference_mode():
+            reconstruction = self._scripted(x)
+            return torch.mean((x - reconstruction) ** 2, dim=1).numpy()
+
+    def score_window(self, data: np.ndarray) -> Optional[dict]:
+        """
+        Autoencoder view of a whole window: errors of every row in one pass, summarized
+        against the calibration threshold. Informational only (the processor reports it next
+        to the anomaly score). None until the autoencoder is trained, or if an error is not
+        finite (values beyond float32), which JSON could not encode.
+        """
+        if not self.is_fitted or self._scripted is None:
+            return None
+        errors = self.reconstruction_errors(data)
+        if not np.isfinite(errors).all():
+            return None
+        last = float(errors[-1])
+        return {
+            "error": last,
+            "mean_error": float(errors.mean()),
+            "max_error": float(errors.max()),
+            "threshold": self.error_threshold,
+            "severity": last / self.error_threshold if self.error_threshold else 0.0
+        }
+
+    def get_state(self) -> dict:
+        """Fitted model state, for snapshots."""
+        return {
+            "detector": self.detector,
+            "iso_forest": self.iso_forest,
+            # Copied: the online detector keeps learning while the snapshot is serialized
+            "hst": copy.deepcopy(self.hst),
+            "input_dim": self.input_dim,
+            # Cloned: state_dict() tensors alias the live parameters, which training updates in place
+            "autoencoder": ({name: tensor.detach().clone() for name, tensor in self.autoencoder.state_dict().items()}
+                            if self._scripted is not None else None),
+            "offset": self._offset,
+            "scale": self._scale,
+            "error_threshold": self.error_threshold,
+            "is_fitted": self.is_fitted
+        }
+
+    def set_state(self, state: dict, data: Optional[np.ndarray] = None):
+        """
+        Restore state produced by get_state().
+        :param data: Recent points (e.g. the restored window) to check the forest export against;
+                     without them the restored forest is served through sklearn
+        """
+        self.iso_forest = state["iso_forest"]
+        self._compile_forest(data)
+        # Older snapshots predate the online detector
+        self.detector = state.get("detector", "isolation_forest")
+        self.hst = state.get("hst")
+        self.is_fitted = state["is_fitted"]
+        if state.get("autoencoder") is not None:
+            self._build_autoencoder(state["input_dim"])
+            self.autoencoder.load_state_dict(state["autoencoder"])
+            self._offset, self._scale = state["offset"], state["scale"]
+            self.error_threshold = state["error_threshold"]
+            self._script_autoencoder()
+
+    def predict_many(self, data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score a batch of points in one vectorized call.
+        :param data: Points to score, one per row
+        :return: (severity, is_anomaly) arrays with one entry per row; higher severity is worse
+        """
+        data = np.asarray(data)
+        if not self.is_fitted:
+            return np.zeros(len(data)), np.zeros(len(data), dtype=bool)
+
+        if self.detector == "half_space_trees":
+            severity = self.hst.severity(data)
+            return severity, severity > 0
+
+        # Lower is more anomalous; IsolationForest.predict() is just decision_function < 0,
+        # so one call gives both the labels and the scores
+        try:
+            iso_score = (self._compiled_forest or self.iso_forest).decision_function(data)
+        except ValueError:
+            # Non-finite input: only sklearn knows how to route it
+            iso_score = self.iso_forest.decision_function(data)
+        return -iso_score, iso_score < 0
+
     def predict(self, data: np.ndarray) -> dict:
         """
         Predict anomalies.
         :param data: New data points
-        :return: Dictionary with anomaly scores and labels
+        :return: Dictionary with the anomaly score and label of the first point
         """
         if not self.is_fitted:
             logger.warning("Models not fitted. Returning default safe values.")
-            return {"anomaly": False, "score": 0.0}
-
-        # Isolation Forest Prediction (-1 = anomaly, 1 = normal)
-        iso_pred = self.iso_forest.predict(data)
-        iso_score = self.iso_forest.decision_function(data) # Lower is more anomalous
-
-        # Autoencoder Reconstruction Error
-        # tensor_data = torch.FloatTensor(data)
-        # reconstruction = self.autoencoder(tensor_data)
-        # error = torch.mean((tensor_data - reconstruction) ** 2, dim=1)
+            return {"is_anomaly": False, "severity": 0.0}
 
+        severity, is_anomaly = self.predict_many(data)
         return {
-            "is_anomaly": bool(iso_pred[0] == -1),
-            "severity": float(-iso_score[0]) # Invert so higher is worse
+            "is_anomaly": bool(is_anomaly[0]),
+            "severity": float(severity[0])
         }
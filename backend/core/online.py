@@ -0,0 +1,158 @@
+import numpy as np
+from typing import Optional, Tuple
+
+
+class HalfSpaceTrees:
+    """
+    Streaming anomaly detector (Half-Space Trees, Tan, Ting & Liu 2011).
+
+    An ensemble of complete binary trees with random axis-aligned splits, built once over a
+    randomly perturbed workspace around the calibration data. Each node keeps two mass counts:
+    a reference profile (the last full window of points) that scoring reads, and a latest
+    profile that update() fills. Every window_size points the latest profile becomes the
+    reference, so the model follows drift without refitting. All trees are stored as flat
+    arrays, so memory is fixed at construction and an update costs O(n_trees * depth).
+
+    Scores are mass-based: a point landing in sparsely populated regions of the reference
+    profile scores low. score() normalizes the mass by the reference size, so a point where
+    the reference is uniformly dense scores about 1.
+    """
+
+    def __init__(self, n_trees: int = 25, depth: int = 6, window_size: int = 256,
+                 size_limit: float = 0.1, contamination: float = 0.1, seed: int = 42):
+        """
+        :param n_trees: Trees in the ensemble
+        :param depth: Depth of every tree (2**(depth + 1) - 1 nodes each)
+        :param window_size: Points per mass profile; the reference is swapped every window_size updates
+        :param size_limit: Scoring stops at the first node holding less than this fraction of the reference
+        :param contamination: Fraction of the calibration points scoring below the anomaly threshold
+        :param seed: Seed for the workspace and split dimensions
+        """
+        if n_trees < 1 or depth < 1 or window_size < 1:
+            raise ValueError("n_trees, depth and window_size must be positive")
+        self.n_trees = n_trees
+        self.depth = depth
+        self.window_size = window_size
+        self.size_limit = size_limit
+        self.contamination = contamination
+        self.seed = seed
+        self.n_nodes = 2 ** (depth + 1) - 1
+        self.n_features: Optional[int] = None
+        self._split_dim: Optional[np.ndarray] = None    # (n_trees, internal nodes)
+        self._split_value: Optional[np.ndarray] = None  # (n_trees, internal nodes), in input units
+        # (masses, point count) read by score(); one tuple, replaced whole, so a scorer on another
+        # thread never pairs one profile's masses with another's count
+        self._reference: Optional[Tuple[np.ndarray, int]] = None
+        self._latest: Optional[np.ndarray] = None       # (n_trees, n_nodes) masses being collected
+        self._latest_count = 0
+        self.threshold: Optional[float] = None
+        self._trees = np.arange(n_trees)
+
+    @property
+    def is_fitted(self) -> bool:
+        return self._reference is not None
+
+    def fit(self, data: np.ndarray) -> "HalfSpaceTrees":
+        """Build the trees around `data` and use it as the first reference profile."""
+        data = np.asarray(data, dtype=float)
+        rng = np.random.default_rng(self.seed)
+        self.n_features = data.shape[1]
+        offset = data.min(axis=0)
+        scale = np.maximum(data.max(axis=0) - offset, 1e-9)
+
+        # Random workspace per tree and feature in [0, 1] units: centred on s ~ U(0, 1) with
+        # half-width 2 * max(s, 1 - s), so it always covers the calibration range
+        s = rng.uniform(0.0, 1.0, (self.n_trees, self.n_features))
+        half_width = 2.0 * np.maximum(s, 1.0 - s)
+        low = np.empty((self.n_trees, self.n_nodes, self.n_features))
+        high = np.empty_like(low)
+        low[:, 0], high[:, 0] = s - half_width, s + half_width
+
+        n_internal = 2 ** self.depth - 1
+        self._split_dim = rng.integers(0, self.n_features, (self.n_trees, n_internal)).astype(np.intp)
+        split = np.empty((self.n_trees, n_internal))
+        for node in range(n_internal):
+            dim = self._split_dim[:, node]
+            mid = (low[self._trees, node, dim] + high[self._trees, node, dim]) / 2.0
+            split[:, node] = mid
+            left, right = 2 * node + 1, 2 * node + 2
+            low[:, left], high[:, left] = low[:, node], high[:, node]
+            low[:, right], high[:, right] = low[:, node], high[:, node]
+            high[self._trees, left, dim] = mid
+            low[self._trees, right, dim] = mid
+        self._split_value = offset[self._split_dim] + split * scale[self._split_dim]
+
+        self._latest = np.zeros((self.n_trees, self.n_nodes), dtype=np.int32)
+        self._latest_count = 0
+        self._reference = None
+        self._add(data)
+        self._swap()
+        # Anomaly threshold: the contamination quantile of the calibration scores
+        self.threshold = float(np.quantile(self.score(data), self.contamination))
+        return self
+
+    def _paths(self, data: np.ndarray) -> np.ndarray:
+        """(n_points, n_trees, depth + 1) node index of every point at every level of every tree."""
+        n = len(data)
+        values = data.ravel()
+        # Flat offsets, so each level is a few 1-D takes instead of 2-D fancy indexing
+        row_offset = (np.arange(n) * self.n_features)[:, None]
+        tree_offset = self._trees * self._split_dim.shape[1]
+        split_dim = self._split_dim.ravel()
+        split_value = self._split_value.ravel()
+        paths = np.zeros((n, self.n_trees, self.depth + 1), dtype=np.intp)
+        nodes = paths[:, :, 0]
+        for level in range(self.depth):
+            index = tree_offset + nodes
+            go_right = values.take(row_offset + split_dim.take(index)) >= split_value.take(index)
+            nodes = 2 * nodes + 1 + go_right
+            paths[:, :, level + 1] = nodes
+        return paths
+
+    def _add(self, data: np.ndarray):
+        flat = (self._trees[:, None] * self.n_nodes + self._paths(data)).ravel()
+        if len(data) == 1:
+            # One node per level per tree, no repeats
+            self._latest.ravel()[flat] += 1
+        else:
+            self._latest += np.bincount(flat, minlength=self._latest.size).reshape(self._latest.shape).astype(np.int32)
+        self._latest_count += len(data)
+
+    def _swap(self):
+        # The retired latest array is never written again, so scorers can keep reading it
+        self._reference = (self._latest, self._latest_count)
+        self._latest = np.zeros_like(self._latest)
+        self._latest_count = 0
+
+    def update(self, data: np.ndarray):
+        """Count points (oldest first) into the latest profile, swapping profiles at window boundaries."""
+        data = np.asarray(data, dtype=float).reshape(-1, self.n_features)
+        start = 0
+        while start < len(data):
+            end = start + min(self.window_size - self._latest_count, len(data) - start)
+            self._add(data[start:end])
+            start = end
+            if self._latest_count >= self.window_size:
+                self._swap()
+
+    def score(self, data: np.ndarray) -> np.ndarray:
+        """Normalized mass score per point; lower is more anomalous."""
+        data = np.asarray(data, dtype=float).reshape(-1, self.n_features)
+        reference, reference_count = self._reference
+        paths = self._paths(data)
+        mass = reference[self._trees[None, :, None], paths]
+        below = mass < self.size_limit * reference_count
+        # Each tree scores at the first node below the size limit, or at its leaf
+        level = np.where(below.any(axis=2), below.argmax(axis=2), self.depth)
+        node_mass = np.take_along_axis(mass, level[:, :, None], axis=2)[:, :, 0]
+        total = (node_mass * 2.0 ** level).sum(axis=1)
+        return total / (self.n_trees * max(reference_count, 1))
+
+    def severity(self, data: np.ndarray) -> np.ndarray:
+        """
+        Anomaly severity per point on the Isolation Forest scale: 0 at the threshold, up to 0.5
+        for points in empty regions, negative (down to -0.5) for normal points.
+        """
+        scores = self.score(data)
+        threshold = self.threshold or 1e-9
+        return np.clip(0.5 * (threshold - scores) / threshold, -0.5, 0.5)
@@ -0,0 +1,70 @@
+import json
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class PayloadError(ValueError):
+    """Raised for malformed batch ingest payloads."""
+
+
+def parse_event_batch(body: bytes, content_type: Optional[str] = None) -> Tuple[np.ndarray, Optional[list]]:
+    """
+    Parse a batch of events into a value array.
+    Accepted layouts:
+    - NDJSON: one event object per line
+    - Columnar JSON: {"value": [...], "timestamp": [...]}
+    - JSON array of event objects
+    :param body: Raw request body
+    :param content_type: Request content type, used to detect NDJSON
+    :return: Tuple (values as float64 array, timestamps or None)
+    :raises PayloadError: if the payload cannot be parsed
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    try:
+        if media_type in NDJSON_CONTENT_TYPES:
+            events = [json.loads(line) for line in body.splitlines() if line.strip()]
+            return _from_events(events)
+
+        payload = json.loads(body or b"null")
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise PayloadError(f"Invalid JSON: {e}")
+
+    if isinstance(payload, list):
+        return _from_events(payload)
+    if isinstance(payload, dict) and isinstance(payload.get("value"), list):
+        return _from_columns(payload)
+    raise PayloadError('Expected NDJSON, a JSON array of events, or columnar {"value": [...]}')
+
+
+def _from_columns(payload: Dict[str, Any]):
+    try:
+        values = np.asarray(payload["value"], dtype=np.float64)
+    except (TypeError, ValueError):
+        raise PayloadError("'value' must be a list of numbers")
+    _check_finite(values)
+    timestamps = payload.get("timestamp")
+    if timestamps is not None and not isinstance(timestamps, list):
+        raise PayloadError("'timestamp' must be a list")
+    if timestamps is not None and len(timestamps) != len(values):
+        raise PayloadError("'timestamp' and 'value' must have the same length")
+    return values, timestamps
+
+
+def _from_events(events: list):
+    if not all(isinstance(event, dict) for event in events):
+        raise PayloadError("Every event must be a JSON object")
+    try:
+        values = np.fromiter((float(event.get("value", 0)) for event in events), dtype=np.float64, count=len(events))
+    except (TypeError, ValueError):
+        raise PayloadError("Event values must be numbers")
+    _check_finite(values)
+    timestamps = [event.get("timestamp") for event in events] if any("timestamp" in e for e in events) else None
+    return values, timestamps
+
+
+def _check_finite(values: np.ndarray):
+    # null parses to NaN and 1e400 to inf; either would only fail later, when the result is encoded
+    if not np.isfinite(values).all():
+        raise PayloadError("Values must be finite numbers")
@@ -1,75 +1,432 @@
+import asyncio
+import math
 import numpy as np
-import pandas as pd
-from collections import deque
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
-from .tda import TopologyAnalyzer
+import time
+from .tda import TopologyAnalyzer, compute_persistence_standalone
+from .executor import AnalysisExecutor
+from .buffers import RingBuffer, JitterPool
 from .ml import AnomalyDetector
 from .security import ThreatClassifier
+from .metrics import metrics
 from database.models import AnomalyLogModel
 from datetime import datetime
 
 logger = logging.getLogger("topoforge.processor")
 
 class DataProcessor:
-    def __init__(self, window_size: int = 50):
+    def __init__(self, window_size: int = 50, executor: Optional[AnalysisExecutor] = None,
+                 buffer_dtype=np.float64, log_writer=None, persist_anomalies: bool = True,
+                 jitter_seed: int = 0, **tda_options):
+        """
+        :param window_size: Number of events per analysis window
+        :param executor: Optional (shared) AnalysisExecutor that runs the CPU-heavy stage off the event loop
+        :param buffer_dtype: Dtype of the event ring buffer (float64 or float32)
+        :param log_writer: Optional (shared) AnomalyLogWriter; anomaly logs are queued on it instead of
+                           being inserted inline
+        :param persist_anomalies: Set False to not log anomalous windows at all
+        :param jitter_seed: Seed of the jitter column; a stream replayed from its start with the same
+                            seed rebuilds the same point clouds (see JitterPool)
+        :param tda_options: Forwarded to TopologyAnalyzer (engine, max_dimension, n_landmarks, landmark_method,
+                            latency_budget_ms, thresh_quantile, cache)
+        """
         self.window_size = window_size
-        self.event_buffer = deque(maxlen=window_size)
-        self.tda = TopologyAnalyzer()
+        # Rows are [value, jitter]; preallocated so ingest never reallocates or copies the window
+        self.event_buffer = RingBuffer(window_size, 2, dtype=buffer_dtype)
+        self._jitter = JitterPool(scale=0.1, seed=jitter_seed)
+        self.tda = TopologyAnalyzer(window_size=window_size, **tda_options)
+        self.executor = executor
         self.ml = AnomalyDetector()
         self.security = ThreatClassifier()
         self.is_calibrated = False
         self.anomaly_model = AnomalyLogModel()
+        self.log_writer = log_writer
+        self.persist_anomalies = persist_anomalies
         self.config = {
-            "anomaly_threshold": 65.0
+            "anomaly_threshold": 65.0,
+            # Landscape layers per homology dimension; > 1 adds multi-layer H0/H1/H2 landscapes
+            "landscape_layers": 1,
+            # Evaluation cadence: full analysis every hop_size events and/or every eval_interval_ms
+            # (0 disables either trigger; both 0 evaluates every event)
+            "hop_size": 1,
+            "eval_interval_ms": 0,
+            # Events per analysis within an ingest_batch() call without an explicit hop
+            # (0 analyzes each batch once, after its last event)
+            "batch_hop": 0,
+            # Point detector: "isolation_forest" (fitted once on calibration) or
+            # "half_space_trees" (learns online from every event, so it follows drift)
+            "detector": "isolation_forest"
         }
+        self._events_since_eval = 0
+        # Events not yet fed to the online detector; they are fed in batches (see _learn_online)
+        self._online_pending = 0
+        self._last_eval_time = 0.0
+        self._last_result: Optional[Dict[str, Any]] = None
+        # Background training of the first full window (with an executor), awaited by process_window
+        self._calibration: Optional[asyncio.Future] = None
+
+    # Numeric config keys and their types, coerced on update
+    NUMERIC_CONFIG = {
+        "anomaly_threshold": float,
+        "landscape_layers": int,
+        "hop_size": int,
+        "eval_interval_ms": float,
+        "batch_hop": int
+    }
 
     def update_config(self, new_config: Dict[str, Any]):
         """Update processor configuration dynamically."""
-        self.config.update(new_config)
+        for key, value in new_config.items():
+            if key in self.NUMERIC_CONFIG:
+                try:
+                    value = self.NUMERIC_CONFIG[key](value)
+                except (TypeError, ValueError):
+                    logger.warning(f"Ignoring invalid value for {key}: {value!r}")
+                    continue
+                # nan passes the coercion and every comparison (a nan threshold never flags anything);
+                # inf is only meaningful as a threshold, where it turns flagging off
+                if not (math.isfinite(value) or (key == "anomaly_threshold" and value == math.inf)):
+                    logger.warning(f"Ignoring non-finite value for {key}: {value!r}")
+                    continue
+                if value < 0:
+                    logger.warning(f"Ignoring negative value for {key}: {value!r}")
+                    continue
+            elif key == "detector":
+                if value not in AnomalyDetector.DETECTORS:
+                    logger.warning(f"Ignoring unknown detector: {value!r}")
+                    continue
+                # A detector selected after calibration is fitted on the current window
+                self.ml.select_detector(value, self.event_buffer.view() if self.is_calibrated else None)
+                self._online_pending = 0
+            self.config[key] = value
         logger.info(f"Processor config updated: {self.config}")
 
+    def evaluation_due(self) -> bool:
+        """True if the hop size or evaluation interval calls for a full analysis."""
+        if self._last_result is None:
+            return True
+        hop = self.config.get("hop_size", 1)
+        interval = self.config.get("eval_interval_ms", 0)
+        if hop <= 0 and interval <= 0:
+            return True
+        if hop > 0 and self._events_since_eval >= hop:
+            return True
+        return interval > 0 and (time.monotonic() - self._last_eval_time) * 1000.0 >= interval
+
+    def _intermediate_result(self) -> Dict[str, Any]:
+        """
+        Result for events between evaluations: the last full analysis plus a cheap
+        z-score of the newest value against the current window.
+        """
+        window = self.event_buffer.view()[:, 0]
+        std = float(np.std(window))
+        z = abs(float(window[-1]) - float(np.mean(window))) / std if std > 0 else 0.0
+        return {
+            **self._last_result,
+            "evaluated": False,
+            "events_since_eval": self._events_since_eval,
+            "incremental_score": min(z * 20, 100.0)
+        }
+
     def ingest(self, event: Dict[str, Any]):
         """
         Ingest a single event into the buffer.
         """
         try:
             val = float(event.get('value', 0))
-            vector = [val, np.random.normal(0, 0.1)] 
+            # Jitter only exists to give Rips a 2-D cloud; scalar engines read the values directly
+            jitter = 0.0 if self.tda.is_scalar else self._jitter.next()
+            vector = (val, jitter)
             self.event_buffer.append(vector)
+            self._events_since_eval += 1
+            if self.tda.is_streaming:
+                self.tda.update(vector)
             
             if len(self.event_buffer) >= self.window_size and not self.is_calibrated:
                 self._calibrate()
+            else:
+                self._learn_online(1)
                 
         except Exception as e:
             logger.error(f"Ingestion error: {e}")
 
+    def ingest_many(self, values) -> int:
+        """
+        Ingest a batch of scalar values with one vectorized buffer write.
+        :param values: Sequence of event values, oldest first
+        :return: Number of events ingested
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values) == 0:
+            return 0
+        jitter = np.zeros(len(values)) if self.tda.is_scalar else self._jitter.draw(len(values))
+        rows = np.column_stack((values, jitter))
+        if self._online_pending + len(rows) > self.window_size and self._learns_online:
+            # Pending rows are about to be overwritten in the buffer; feed everything now
+            self._flush_online()
+            self.ml.update(rows)
+            rows_learned = True
+        else:
+            rows_learned = False
+        self.event_buffer.extend(rows)
+        self._events_since_eval += len(values)
+        if self.tda.is_streaming:
+            for row in rows[-self.window_size:]:
+                self.tda.update(row)
+
+        if len(self.event_buffer) >= self.window_size and not self.is_calibrated:
+            self._calibrate()
+        elif not rows_learned:
+            self._learn_online(len(rows))
+        return len(values)
+
+    @property
+    def _learns_online(self) -> bool:
+        return self.is_calibrated and self.ml.detector == "half_space_trees"
+
+    def _learn_online(self, n_new: int):
+        """
+        Count the newest n_new buffered events towards the online detector. They are fed
+        in one vectorized update per window (or per evaluation) rather than one per event.
+        """
+        if not self._learns_online:
+            return
+        self._online_pending += n_new
+        if self._online_pending >= self.window_size:
+            self._flush_online()
+
+    def _flush_online(self):
+        """Feed the pending buffered events to the online detector."""
+        pending = min(self._online_pending, len(self.event_buffer))
+        self._online_pending = 0
+        if pending and self._learns_online:
+            self.ml.update(self.event_buffer.view()[-pending:])
+
+    async def ingest_batch(self, values, hop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Ingest a batch of values and analyze once every `hop` events, as if each hop's
+        last event had just arrived. Hops continue across batches: events left over at
+        the end of a batch count towards the first hop of the next one.
+        :param values: Sequence of event values, oldest first
+        :param hop: Events per analysis (defaults to the batch_hop config; 0 analyzes the
+                    whole batch once)
+        :return: One result per completed hop (hops ending while still buffering are skipped)
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        hop = hop or int(self.config.get("batch_hop", 0))
+        if hop <= 0:
+            if not self.ingest_many(values):
+                return []
+            result = await self.process_window(force=True)
+            return [result] if result.get("evaluated") else []
+
+        results = []
+        start = 0
+        while start < len(values):
+            end = start + max(hop - self._events_since_eval, 1)
+            self.ingest_many(values[start:end])
+            start = end
+            if self._events_since_eval < hop:
+                break
+            result = await self.process_window(force=True)
+            if result.get("evaluated"):
+                results.append(result)
+        return results
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Warm-restart state: window contents, fitted models, config, cadence and the
+        adaptive TDA cost model. Arrays are copied, so the snapshot can be serialized
+        off the event loop while ingestion continues.
+        """
+        self._flush_online()
+        return {
+            "window_size": self.window_size,
+            "buffer": np.array(self.event_buffer),
+            "config": dict(self.config),
+            "is_calibrated": self.is_calibrated,
+            "ml": self.ml.get_state(),
+            "events_since_eval": self._events_since_eval,
+            "last_result": self._last_result,
+            "cost_model": dict(self.tda.cost_model.coefficients)
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        """Resume from a snapshot() so scoring continues without re-buffering or recalibrating."""
+        buffer = np.asarray(state["buffer"])
+        if state["window_size"] != self.window_size or buffer.shape[1:] != (self.event_buffer.n_features,):
+            raise ValueError(
+                f"Snapshot window {state['window_size']}x{buffer.shape[1:]} does not match this processor "
+                f"({self.window_size}x{self.event_buffer.n_features})"
+            )
+        self.event_buffer.clear()
+        self.event_buffer.extend(buffer)
+        if self.tda.is_streaming:
+            # Streaming engines rebuild their rolling state from the restored window
+            self.tda.reset()
+            for row in self.event_buffer.view():
+                self.tda.update(row)
+        self.config.update(state["config"])
+        self.ml.set_state(state["ml"], self.event_buffer.view())
+        self.is_calibrated = state["is_calibrated"]
+        self._events_since_eval = state["events_since_eval"]
+        self._online_pending = 0
+        self._last_result = state["last_result"]
+        self._last_eval_time = time.monotonic()
+        self.tda.cost_model.coefficients.update(state["cost_model"])
+
     def _calibrate(self):
-        """Train initial models on the first full window."""
+        """
+        Train initial models on the first full window. With an executor and a running event
+        loop, training runs in the background (the autoencoder alone takes a few hundred ms);
+        process_window waits for it, so the first evaluation still sees the trained models.
+        """
+        if self._calibration is not None:
+            return
+        # Owned copy: ingest keeps writing to the buffer while the models train
         data = np.array(self.event_buffer)
-        self.ml.train(data)
+        try:
+            loop = asyncio.get_running_loop() if self.executor is not None else None
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            self.ml.train(data)
+            self._calibrated()
+            return
+        self._calibration = loop.create_task(self._calibrate_off_loop(data))
+
+    async def _calibrate_off_loop(self, data: np.ndarray):
+        try:
+            if self.executor.kind == "thread":
+                await self.executor.run(self.ml.train, data)
+            else:
+                # Fitted models must live in this process, so the process pool can't train them
+                await asyncio.get_running_loop().run_in_executor(None, self.ml.train, data)
+        except Exception as e:
+            # Rejected or failed; the next event retries
+            logger.error(f"Calibration failed: {e}")
+        else:
+            self._calibrated()
+        finally:
+            self._calibration = None
+
+    def _calibrated(self):
         self.is_calibrated = True
+        # The calibration window is the online detector's first reference profile
+        self._online_pending = 0
         logger.info("System calibrated on initial data window.")
 
-    async def process_window(self) -> Dict[str, Any]:
+    async def process_window(self, force: bool = False) -> Dict[str, Any]:
         """
         Run TDA and ML on the current window.
+        With an executor, the CPU-heavy analysis runs in its pool and the event loop stays free.
+        Between evaluations (see hop_size / eval_interval_ms) the last result is returned
+        with "evaluated": False and a lightweight incremental score.
+        :param force: Evaluate even if the cadence says it is not due
+        :raises AnalysisOverloaded: if the executor rejects the window
         """
         if len(self.event_buffer) < 10:
             return {"status": "buffering", "count": len(self.event_buffer)}
+        if self._calibration is not None:
+            await asyncio.wait([self._calibration])
 
-        data = np.array(self.event_buffer)
-        
+        if not force and not self.evaluation_due():
+            metrics.inc("topoforge_windows_total", evaluated="false")
+            return self._intermediate_result()
+        window_start = time.perf_counter()
+        # Reset the cadence before awaiting so concurrent events don't trigger the same evaluation
+        events_since_eval = self._events_since_eval
+        self._events_since_eval = 0
+        self._last_eval_time = time.monotonic()
+        # Bring the online detector up to date before it scores this window
+        self._flush_online()
+
+        # Off-loop analysis needs an owned snapshot since ingest keeps writing to the buffer;
+        # inline analysis can read the ring buffer's zero-copy view
+        data = self.event_buffer.view() if self.executor is None else np.array(self.event_buffer)
+        metrics.observe("topoforge_window_size", len(data))
+        if self.executor is not None:
+            metrics.observe("topoforge_analysis_queue_depth", self.executor.queue_depth)
+
+        try:
+            with metrics.time("topoforge_stage_seconds", stage="analysis"):
+                result = await self._run_analysis(data, events_since_eval)
+        except Exception:
+            # Rejected or failed; let the next event retry
+            self._events_since_eval += events_since_eval
+            raise
+
+        result["evaluated"] = True
+        result["events_since_eval"] = events_since_eval
+        self._last_result = result
+        with metrics.time("topoforge_stage_seconds", stage="anomaly_log"):
+            await self._log_anomaly(result, data)
+        metrics.inc("topoforge_windows_total", evaluated="true")
+        if result["is_anomaly"]:
+            metrics.inc("topoforge_anomalies_total")
+        metrics.observe("topoforge_stage_seconds", time.perf_counter() - window_start, stage="window")
+        return result
+
+    async def _run_analysis(self, data: np.ndarray, n_new: int = 1) -> Dict[str, Any]:
+        """Dispatch the analysis stage inline or through the executor."""
+        if self.executor is None:
+            return self._analyze_window(data, n_new=n_new)
+        if self.executor.kind == "process" and not self.tda.is_streaming:
+            # Only the persistence step is picklable; the rest is cheap enough to finish here.
+            # The cache and cost model live in this process, so they are consulted and fed here
+            persistence = self.tda.cached_persistence(data)
+            if persistence is None:
+                with metrics.time("topoforge_stage_seconds", stage="persistence"):
+                    persistence = await self.executor.run(compute_persistence_standalone,
+                                                          self.tda.stateless_options(), data,
+                                                          dict(self.tda.cost_model.coefficients))
+                persistence = self.tda.record_persistence(data, persistence)
+            return self._analyze_window(data, persistence, n_new)
+        if self.executor.kind == "process":
+            # Streaming engines keep their window in this process and are cheap per event
+            return self._analyze_window(data, n_new=n_new)
+        return await self.executor.run(self._analyze_window, data, None, n_new)
+
+    def _analyze_window(self, data: np.ndarray, persistence: Optional[tuple] = None,
+                        n_new: int = 1) -> Dict[str, Any]:
+        """
+        CPU-bound analysis of one window snapshot (TDA, ML, scoring, classification).
+        Safe to run in a worker thread.
+        :param data: Window snapshot
+        :param persistence: Precomputed (diagrams, approximation, degradation), e.g. from a process pool
+        :param n_new: Events since the last evaluation; all of them are scored by the point detector
+        """
         # 1. TDA Analysis
-        diagrams = self.tda.compute_persistence(data)
-        betti = self.tda.extract_betti_numbers(diagrams)
-        entropy = self.tda.compute_persistence_entropy(diagrams)
-        total_lifetime = self.tda.compute_total_lifetime(diagrams)
-        landscape = self.tda.compute_persistence_landscape(diagrams)
+        if persistence is None:
+            # Streaming engines keep their own window (e.g. a rolling distance matrix)
+            with metrics.time("topoforge_stage_seconds", stage="persistence"):
+                diagrams = self.tda.compute_persistence(None if self.tda.is_streaming else data)
+            approximation, degradation = self.tda.last_approximation, self.tda.last_degradation
+        else:
+            diagrams, approximation, degradation = persistence
+        # Lifetimes are computed once for Betti numbers, entropy and total lifetime
+        with metrics.time("topoforge_stage_seconds", stage="summary"):
+            summary = self.tda.summarize_diagrams(diagrams)
+        betti = summary.betti_numbers
+        entropy = summary.entropy
+        total_lifetime = summary.total_lifetime
+        with metrics.time("topoforge_stage_seconds", stage="landscape"):
+            landscape = self.tda.compute_persistence_landscape(diagrams)
+        landscape_layers = int(self.config.get("landscape_layers", 1))
         
         # 2. ML Anomaly Detection
-        ml_result = self.ml.predict(data[-1].reshape(1, -1))
-        ml_score = float(ml_result['severity'])
+        with metrics.time("topoforge_stage_seconds", stage="ml"):
+            # Every point since the last evaluation in one call, so points between hops are
+            # scored too; the window takes the most severe one
+            n_new = min(max(int(n_new), 1), len(data))
+            severities, flagged = self.ml.predict_many(data[-n_new:])
+            worst = int(np.argmax(severities))
+        with metrics.time("topoforge_stage_seconds", stage="autoencoder"):
+            # Reconstruction errors of the whole window in one batched forward pass. Informational:
+            # reported as result["reconstruction"], not part of anomaly_score
+            reconstruction = self.ml.score_window(data)
+        ml_score = float(severities[worst])
         
         # 3. Anomaly Scoring Logic
         # Weights: Betti (Structure) = 40%, Entropy (Chaos) = 30%, ML (Statistical) = 30%
@@ -89,58 +446,100 @@ class DataProcessor:
         ml_score_norm = min(max(ml_score * 100 + 50, 0), 100)
         
         # Weighted Sum
-        final_score = (0.4 * betti_score) + (0.3 * entropy_score) + (0.3 * ml_score_norm)
+        if degradation is not None and degradation["level"] > 0:
+            # Persistence was cut down to meet the latency budget: fewer dimensions, a Rips threshold
+            # (which turns long bars infinite) or a subsample all shift Betti numbers and entropy by
+            # themselves, so under load the window is scored by the ML term alone
+            weights = {"betti": 0.0, "entropy": 0.0, "ml": 1.0}
+        else:
+            weights = {"betti": 0.4, "entropy": 0.3, "ml": 0.3}
+        final_score = (weights["betti"] * betti_score) + (weights["entropy"] * entropy_score) + (weights["ml"] * ml_score_norm)
         
         # Determine anomaly status based on score
         threshold = self.config.get("anomaly_threshold", 65.0)
         is_anomaly = final_score > threshold
         
         # 4. Security Classification
-        security_context = self.security.classify({
-            "anomaly_score": final_score,
-            "betti_numbers": betti,
-            "entropy": entropy
-        })
+        with metrics.time("topoforge_stage_seconds", stage="security"):
+            security_context = self.security.classify({
+                "anomaly_score": final_score,
+                "betti_numbers": betti,
+                "entropy": entropy
+            })
         
+        topology_features = {
+            "entropy": float(entropy),
+            "total_lifetime": float(total_lifetime),
+            "max_lifetime": float(summary.max_lifetime),
+            "landscape": landscape
+        }
+        if approximation is not None:
+            # Landmark subsampling was used, report the bottleneck error bound with the features
+            topology_features["approximation"] = approximation
+        if degradation is not None:
+            topology_features["degradation"] = degradation
+        if landscape_layers > 1:
+            with metrics.time("topoforge_stage_seconds", stage="landscape"):
+                topology_features["landscapes"] = self.tda.compute_persistence_landscapes(
+                    diagrams, num_layers=landscape_layers
+                )
+
         result = {
             "betti_numbers": betti,
-            "topology_features": {
-                "entropy": float(entropy),
-                "total_lifetime": float(total_lifetime),
-                "landscape": landscape
-            },
+            "topology_features": topology_features,
             "scores": {
                 "total": float(final_score),
                 "betti": float(betti_score),
                 "entropy": float(entropy_score),
-                "ml": float(ml_score_norm)
+                "ml": float(ml_score_norm),
+                "weights": weights
             },
             "anomaly_score": float(final_score),
             "is_anomaly": is_anomaly,
             "security_analysis": security_context,
             "window_size": len(data),
+            "ml_points": {
+                "scored": n_new,
+                "flagged": int(np.count_nonzero(flagged)),
+                # Events between the most severe point and the newest one
+                "worst_offset": n_new - 1 - worst
+            },
             "timestamp": datetime.utcnow()
         }
-        
-        # Log to Database if anomaly or periodically
-        if result["is_anomaly"]:
-            try:
-                await self.anomaly_model.create_log({
-                    "timestamp": result["timestamp"],
-                    "source_type": "stream_processor",
-                    "event_data": {"recent_values": data[-5:].tolist()},
-                    "betti_h0": betti.get("h0", 0),
-                    "betti_h1": betti.get("h1", 0),
-                    "betti_h2": betti.get("h2", 0),
-                    "anomaly_score": result["anomaly_score"],
-                    "is_anomaly": True,
-                    "metadata": {
-                        **security_context,
-                        "scores": result["scores"],
-                        "topology": result["topology_features"]
-                    }
-                })
-            except Exception as e:
-                logger.error(f"Failed to save anomaly log: {e}")
-        
+        if reconstruction is not None:
+            result["reconstruction"] = reconstruction
         return result
+
+    @staticmethod
+    def anomaly_log(result: Dict[str, Any], data: np.ndarray) -> Dict[str, Any]:
+        """Anomaly log document for an analyzed window."""
+        betti = result["betti_numbers"]
+        return {
+            "timestamp": result["timestamp"],
+            "source_type": "stream_processor",
+            "event_data": {"recent_values": data[-5:].tolist()},
+            "betti_h0": betti.get("h0", 0),
+            "betti_h1": betti.get("h1", 0),
+            "betti_h2": betti.get("h2", 0),
+            "anomaly_score": result["anomaly_score"],
+            "is_anomaly": True,
+            "metadata": {
+                **result["security_analysis"],
+                "scores": result["scores"],
+                "topology": result["topology_features"]
+            }
+        }
+
+    async def _log_anomaly(self, result: Dict[str, Any], data: np.ndarray):
+        """Persist anomalous windows to the anomaly log."""
+        if not result["is_anomaly"] or not self.persist_anomalies:
+            return
+        log = self.anomaly_log(result, data)
+        if self.log_writer is not None:
+            # Queued for a batched background insert, off the reply path
+            self.log_writer.submit(log)
+            return
+        try:
+            await self.anomaly_model.create_log(log)
+        except Exception as e:
+            logger.error(f"Failed to save anomaly log: {e}")
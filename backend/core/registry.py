@@ -0,0 +1,180 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .processor import DataProcessor
+
+logger = logging.getLogger("topoforge.registry")
+
+DEFAULT_STREAM = "default"
+
+
+class ProcessorRegistry:
+    """
+    One DataProcessor per stream (source ID), created on first use.
+    Each stream gets its own window, calibration state and config. Memory stays bounded:
+    idle streams are evicted after idle_ttl_s, and the least-recently-used stream is
+    evicted once more than max_streams are live. Config set through configure() is kept
+    across evictions and applied again when the stream comes back; at most max_streams
+    configs are remembered, and the least recently used config of a stream that is not
+    live is forgotten first.
+    Meant to be used from a single event loop (no locking).
+    """
+
+    def __init__(self, max_streams: int = 1024, idle_ttl_s: float = 900.0,
+                 default_config: Optional[Dict[str, Any]] = None, **processor_options):
+        """
+        :param max_streams: Maximum number of live processors
+        :param idle_ttl_s: Seconds without events before a processor is evicted (0 disables)
+        :param default_config: Config applied to every new processor
+        :param processor_options: Forwarded to DataProcessor (window_size, executor, engine, cache, ...)
+        """
+        if max_streams < 1:
+            raise ValueError("max_streams must be positive")
+        self.max_streams = max_streams
+        self.idle_ttl_s = idle_ttl_s
+        self.default_config = dict(default_config or {})
+        self.processor_options = processor_options
+        # stream_id -> (processor, last access, monotonic); least recently used first
+        self._processors: "OrderedDict[str, Tuple[DataProcessor, float]]" = OrderedDict()
+        # stream_id -> config set through configure(); least recently used first
+        self._configs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.created = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._processors)
+
+    def __contains__(self, stream_id) -> bool:
+        return self._normalize(stream_id) in self._processors
+
+    def __iter__(self) -> Iterator[Tuple[str, DataProcessor]]:
+        return ((stream_id, entry[0]) for stream_id, entry in list(self._processors.items()))
+
+    @staticmethod
+    def _normalize(stream_id) -> str:
+        return str(stream_id) if stream_id not in (None, "") else DEFAULT_STREAM
+
+    @staticmethod
+    def _jitter_seed(stream_id: str) -> int:
+        # Stable across processes (unlike hash()), so a stream keeps its jitter on any worker
+        return int.from_bytes(hashlib.blake2b(stream_id.encode(), digest_size=8).digest(), "big")
+
+    def get(self, stream_id=None) -> DataProcessor:
+        """Processor for stream_id, created (and configured) if it is not live."""
+        stream_id = self._normalize(stream_id)
+        now = time.monotonic()
+        entry = self._processors.get(stream_id)
+        if entry is not None:
+            self._processors[stream_id] = (entry[0], now)
+            self._processors.move_to_end(stream_id)
+            return entry[0]
+
+        self.evict_idle(now)
+        processor = DataProcessor(jitter_seed=self._jitter_seed(stream_id), **self.processor_options)
+        if stream_id in self._configs:
+            self._configs.move_to_end(stream_id)
+        config = {**self.default_config, **self._configs.get(stream_id, {})}
+        if config:
+            processor.update_config(config)
+        self._processors[stream_id] = (processor, now)
+        self.created += 1
+        while len(self._processors) > self.max_streams:
+            evicted, _ = self._processors.popitem(last=False)
+            self.evictions += 1
+            logger.info(f"Evicted least recently used stream '{evicted}'")
+        return processor
+
+    def peek(self, stream_id=None) -> Optional[DataProcessor]:
+        """Live processor for stream_id without creating it or refreshing its recency."""
+        entry = self._processors.get(self._normalize(stream_id))
+        return entry[0] if entry is not None else None
+
+    def configure(self, stream_id, config: Dict[str, Any]) -> DataProcessor:
+        """Update one stream's config; it is remembered if the stream is later evicted."""
+        stream_id = self._normalize(stream_id)
+        self._remember(stream_id, config)
+        processor = self.get(stream_id)
+        processor.update_config(config)
+        self._trim_configs()
+        return processor
+
+    def _remember(self, stream_id: str, config: Dict[str, Any]):
+        self._configs.setdefault(stream_id, {}).update(config)
+        self._configs.move_to_end(stream_id)
+
+    def _trim_configs(self):
+        """Forget the least recently used configs of streams that are not live, down to max_streams."""
+        excess = len(self._configs) - self.max_streams
+        if excess <= 0:
+            return
+        # At most max_streams streams are live, so enough of the others can always go
+        for stream_id in [s for s in self._configs if s not in self._processors][:excess]:
+            del self._configs[stream_id]
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop processors idle for longer than idle_ttl_s. Returns the number evicted."""
+        if self.idle_ttl_s <= 0:
+            return 0
+        now = time.monotonic() if now is None else now
+        evicted = 0
+        # Entries are in recency order, so the idle ones are all at the front
+        while self._processors:
+            stream_id, (_, last_access) = next(iter(self._processors.items()))
+            if now - last_access < self.idle_ttl_s:
+                break
+            del self._processors[stream_id]
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def remove(self, stream_id) -> bool:
+        """Drop a stream's processor and remembered config."""
+        stream_id = self._normalize(stream_id)
+        self._configs.pop(stream_id, None)
+        return self._processors.pop(stream_id, None) is not None
+
+    def snapshot(self, streams: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        State of the live processors (or just `streams`) plus the remembered per-stream
+        config. Cheap enough to take on the event loop; serialize it with write_snapshot.
+        """
+        streams = self._processors if streams is None else streams
+        return {
+            "streams": {
+                stream_id: self._processors[stream_id][0].snapshot()
+                for stream_id in streams if stream_id in self._processors
+            },
+            "configs": {stream_id: dict(config) for stream_id, config in self._configs.items()}
+        }
+
+    def restore(self, state: Dict[str, Any], accept: Optional[Callable[[str], bool]] = None) -> int:
+        """
+        Recreate processors from a snapshot(). Streams rejected by `accept` are skipped.
+        Returns the number of streams restored.
+        """
+        restored = 0
+        for stream_id, config in state.get("configs", {}).items():
+            if accept is None or accept(stream_id):
+                self._remember(stream_id, config)
+        for stream_id, processor_state in state.get("streams", {}).items():
+            if accept is not None and not accept(stream_id):
+                continue
+            try:
+                self.get(stream_id).restore(processor_state)
+                restored += 1
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Not restoring stream '{stream_id}': {e}")
+                self.remove(stream_id)
+        self._trim_configs()
+        return restored
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "streams": len(self._processors),
+            "max_streams": self.max_streams,
+            "created": self.created,
+            "evictions": self.evictions
+        }
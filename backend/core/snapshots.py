@@ -0,0 +1,46 @@
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+import joblib
+
+logger = logging.getLogger("topoforge.snapshots")
+
+# Bumped whenever the snapshot layout changes; older snapshots are ignored on restore
+SNAPSHOT_VERSION = 1
+
+
+def write_snapshot(path: str, state: Dict[str, Any], compress: int = 3):
+    """
+    Write state atomically: dump to a temp file next to path, fsync, then rename over it,
+    so a crash mid-write never leaves a truncated snapshot behind.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            joblib.dump({"version": SNAPSHOT_VERSION, "state": state}, handle, compress=compress)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    """State written by write_snapshot, or None if it is missing, unreadable or from another version."""
+    if not os.path.exists(path):
+        return None
+    try:
+        payload = joblib.load(path)
+    except Exception as e:
+        logger.error(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != SNAPSHOT_VERSION:
+        logger.warning(f"Ignoring snapshot {path} with unsupported version")
+        return None
+    return payload["state"]
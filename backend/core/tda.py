@@ -1,37 +1,974 @@
 import numpy as np
-from ripser import ripser
-from persim import plot_diagrams
+import functools
 import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional, Sequence
+from .cache import DiagramCache
+from .lazy import lazy_import
+
+# Loaded on first use (see core.lazy); ripser alone pulls in sklearn
+_ripser = lazy_import("ripser")
+_sparse = lazy_import("scipy.sparse")
+_csgraph = lazy_import("scipy.sparse.csgraph")
 
 logger = logging.getLogger("topoforge.tda")
 
+class RollingDistanceMatrix:
+    """
+    Pairwise Euclidean distance matrix over a sliding window of points.
+    Each new point overwrites the slot of the oldest one, so only one row and one
+    column (O(n*d)) are recomputed per event instead of the full O(n^2*d) matrix.
+    Slot order is not chronological, which is fine for persistence (it is invariant
+    under point permutations).
+    """
+
+    def __init__(self, window_size: int):
+        """
+        :param window_size: Maximum number of points kept in the window
+        """
+        if window_size < 1:
+            raise ValueError("window_size must be positive")
+        self.window_size = window_size
+        self.points: Optional[np.ndarray] = None
+        self.distances = np.zeros((window_size, window_size))
+        self.count = 0
+        self._next_slot = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def reset(self):
+        self.points = None
+        self.distances[:] = 0.0
+        self.count = 0
+        self._next_slot = 0
+
+    def push(self, point) -> int:
+        """
+        Add a point, evicting the oldest one once the window is full.
+        :return: Slot index the point was written to
+        """
+        point = np.asarray(point, dtype=float).ravel()
+        if self.points is None:
+            self.points = np.zeros((self.window_size, point.shape[0]))
+
+        slot = self._next_slot
+        self.points[slot] = point
+        self.count = min(self.count + 1, self.window_size)
+
+        row = np.sqrt(np.sum((self.points[:self.count] - point) ** 2, axis=1))
+        row[slot] = 0.0
+        self.distances[slot, :self.count] = row
+        self.distances[:self.count, slot] = row
+
+        self._next_slot = (slot + 1) % self.window_size
+        return slot
+
+    def extend(self, points):
+        for point in np.asarray(points, dtype=float):
+            self.push(point)
+
+    def matrix(self) -> np.ndarray:
+        """Distance matrix of the points currently in the window (a view, not a copy)."""
+        return self.distances[:self.count, :self.count]
+
+
+def minimum_spanning_tree_weights(distances: np.ndarray) -> np.ndarray:
+    """
+    Edge weights of the minimum spanning tree of a dense distance matrix (Prim, O(n^2)).
+    These are exactly the finite H0 death times of the Rips filtration.
+    """
+    n = distances.shape[0]
+    if n < 2:
+        return np.empty(0)
+
+    in_tree = np.zeros(n, dtype=bool)
+    in_tree[0] = True
+    best = distances[0].copy()
+    best[0] = np.inf
+    weights = np.empty(n - 1)
+    for i in range(n - 1):
+        v = int(np.argmin(best))
+        weights[i] = best[v]
+        in_tree[v] = True
+        np.minimum(best, distances[v], out=best)
+        best[in_tree] = np.inf
+    return weights
+
+
+def h0_diagram_from_weights(weights: np.ndarray) -> np.ndarray:
+    """H0 persistence diagram (birth 0) from MST edge weights, in Ripser's layout."""
+    deaths = np.sort(weights[weights > 0])
+    dgm = np.zeros((len(deaths) + 1, 2))
+    dgm[:-1, 1] = deaths
+    dgm[-1, 1] = np.inf
+    return dgm
+
+
+class IncrementalMST:
+    """
+    Euclidean minimum spanning tree over a sliding window of points.
+    Zero-dimensional persistence equals the MST edge lengths, so this gives exact H0
+    diagrams without running the Rips pipeline.
+
+    - Insertion: the new MST is contained in the old tree plus the new point's star,
+      so the MST is solved on about 2n candidate edges instead of n^2/2.
+    - Eviction: removing the oldest point splits the tree into deg(v) components
+      (small in practice); only the rows of the smaller components are scanned to
+      find the cheapest reconnecting edges.
+    """
+
+    def __init__(self, window_size: int):
+        self._distances = RollingDistanceMatrix(window_size)
+        self._u = np.empty(0, dtype=np.int64)
+        self._v = np.empty(0, dtype=np.int64)
+        self._w = np.empty(0)
+
+    def __len__(self) -> int:
+        return len(self._distances)
+
+    def reset(self):
+        self._distances.reset()
+        self._set_edges(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+
+    def push(self, point):
+        """Add a point, evicting the oldest one once the window is full."""
+        slot = self._distances._next_slot
+        if len(self._distances) == self._distances.window_size:
+            self._remove_vertex(slot)
+        self._distances.push(point)
+        self._insert_vertex(slot)
+
+    def weights(self) -> np.ndarray:
+        return self._w
+
+    def diagram(self) -> np.ndarray:
+        return h0_diagram_from_weights(self._w)
+
+    def _set_edges(self, u, v, w):
+        self._u, self._v, self._w = u, v, w
+
+    @staticmethod
+    def _spanning_tree(n: int, u, v, w):
+        """MST of a sparse candidate graph; weights are shifted by 1 so zero-length edges survive csgraph."""
+        graph = _sparse.coo_matrix((w + 1.0, (u, v)), shape=(n, n)).tocsr()
+        tree = _csgraph.minimum_spanning_tree(graph).tocoo()
+        return tree.row.astype(np.int64), tree.col.astype(np.int64), tree.data - 1.0
+
+    def _remove_vertex(self, slot: int):
+        incident = (self._u == slot) | (self._v == slot)
+        degree = int(np.count_nonzero(incident))
+        keep = ~incident
+        self._set_edges(self._u[keep], self._v[keep], self._w[keep])
+        if degree < 2:
+            return
+
+        n = len(self._distances)
+        forest = _sparse.coo_matrix((np.ones(len(self._w)), (self._u, self._v)), shape=(n, n))
+        _, labels = _csgraph.connected_components(forest, directed=False)
+        labels[slot] = -1
+        components = np.unique(labels[labels >= 0])
+        sizes = np.array([np.count_nonzero(labels == c) for c in components])
+        largest = components[np.argmax(sizes)]
+
+        # Cheapest edge between every pair of components, scanning only the smaller components' rows
+        index = {c: i for i, c in enumerate(components)}
+        distances = self._distances.matrix()
+        candidates = {}
+        for c in components:
+            if c == largest:
+                continue
+            members = np.flatnonzero(labels == c)
+            rows = distances[members]
+            for other in components:
+                pair = (min(index[c], index[other]), max(index[c], index[other]))
+                if other == c or pair in candidates:
+                    continue
+                cols = np.flatnonzero(labels == other)
+                block = rows[:, cols]
+                i, j = np.unravel_index(np.argmin(block), block.shape)
+                candidates[pair] = (members[i], cols[j], block[i, j])
+
+        # Reconnect with the MST over components (the forest edges are kept as-is)
+        pairs = list(candidates)
+        ku, kv, _ = self._spanning_tree(
+            len(components),
+            np.array([a for a, _ in pairs]),
+            np.array([b for _, b in pairs]),
+            np.array([candidates[p][2] for p in pairs])
+        )
+        chosen = [candidates[(min(a, b), max(a, b))] for a, b in zip(ku, kv)]
+        self._set_edges(
+            np.concatenate([self._u, [e[0] for e in chosen]]).astype(np.int64),
+            np.concatenate([self._v, [e[1] for e in chosen]]).astype(np.int64),
+            np.concatenate([self._w, [e[2] for e in chosen]])
+        )
+
+    def _insert_vertex(self, slot: int):
+        n = len(self._distances)
+        if n < 2:
+            return
+
+        star = np.delete(np.arange(n), slot)
+        self._set_edges(*self._spanning_tree(
+            n,
+            np.concatenate([self._u, np.full(len(star), slot)]),
+            np.concatenate([self._v, star]),
+            np.concatenate([self._w, self._distances.matrix()[slot, star]])
+        ))
+
+
+def sublevel_persistence(values) -> np.ndarray:
+    """
+    H0 sublevel-set persistence of a 1-D sequence (lower-star filtration on a path graph).
+    A union-find sweep over the values in ascending order merges neighbouring runs;
+    by the elder rule the run with the higher minimum dies at the merge value.
+    Runs in O(n log n), dominated by the sort.
+    :param values: 1-D array of samples
+    :return: H0 diagram in Ripser's layout, with one infinite bar for the global minimum
+    """
+    values = np.asarray(values, dtype=float).ravel()
+    n = len(values)
+    if n == 0:
+        return np.empty((0, 2))
+
+    parent = np.full(n, -1)
+    # Minimum value of each run, stored at the run's root
+    birth = values.copy()
+    pairs = []
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i in np.argsort(values, kind="stable"):
+        parent[i] = i
+        for j in (i - 1, i + 1):
+            if j < 0 or j >= n or parent[j] < 0:
+                continue
+            ri, rj = find(i), find(j)
+            if ri == rj:
+                continue
+            elder, younger = (ri, rj) if birth[ri] <= birth[rj] else (rj, ri)
+            if values[i] > birth[younger]:
+                pairs.append((birth[younger], values[i]))
+            parent[younger] = elder
+
+    dgm = np.array(pairs + [(values.min(), np.inf)])
+    return dgm[np.argsort(dgm[:, 1] - dgm[:, 0], kind="stable")]
+
+
+def maxmin_landmarks(n_landmarks: int, points: Optional[np.ndarray] = None,
+                     distances: Optional[np.ndarray] = None, seed: Optional[int] = None):
+    """
+    Maxmin (farthest-point) coreset: start from a random point and repeatedly add the
+    point farthest from the landmarks chosen so far.
+    :param n_landmarks: Number of landmarks to select
+    :param points: Point cloud of shape (n_samples, n_features), or
+    :param distances: Precomputed (n_samples, n_samples) distance matrix
+    :param seed: Seed for the starting point
+    :return: Tuple (landmark indices, covering radius of the landmark set)
+    """
+    n = distances.shape[0] if distances is not None else points.shape[0]
+    if n_landmarks >= n:
+        return np.arange(n), 0.0
+
+    def distances_from(i):
+        if distances is not None:
+            return distances[i]
+        return np.sqrt(np.sum((points - points[i]) ** 2, axis=1))
+
+    landmarks = np.empty(n_landmarks, dtype=np.int64)
+    landmarks[0] = np.random.default_rng(seed).integers(n)
+    nearest = distances_from(landmarks[0]).copy()
+    for k in range(1, n_landmarks):
+        landmarks[k] = int(np.argmax(nearest))
+        np.minimum(nearest, distances_from(landmarks[k]), out=nearest)
+    return landmarks, float(nearest.max())
+
+
+class PersistenceCostModel:
+    """
+    Predicts Ripser run time from the point count as coeff * n ** exponent, per homology
+    dimension and per thresholded/unthresholded run. Coefficients start from rough priors
+    and follow observed timings with an exponentially weighted moving average.
+    """
+    # Empirical growth of Ripser's run time with n for maxdim 0/1/2
+    EXPONENTS = {0: 2.0, 1: 2.0, 2: 3.5}
+    # Seconds per n ** exponent, measured on a laptop-class CPU
+    PRIORS = {0: 2.5e-7, 1: 8e-7, 2: 1.2e-8}
+    # A Rips threshold typically removes about half of the work
+    THRESHOLD_FACTOR = 0.5
+
+    def __init__(self, smoothing: float = 0.3):
+        self.smoothing = smoothing
+        self.coefficients = {}
+
+    def _exponent(self, maxdim: int) -> float:
+        return self.EXPONENTS.get(maxdim, self.EXPONENTS[2])
+
+    def _coefficient(self, maxdim: int, thresholded: bool) -> float:
+        key = (maxdim, thresholded)
+        if key not in self.coefficients:
+            prior = self.PRIORS.get(maxdim, self.PRIORS[2])
+            return prior * self.THRESHOLD_FACTOR if thresholded else prior
+        return self.coefficients[key]
+
+    def predict(self, n_points: int, maxdim: int, thresholded: bool = False) -> float:
+        """Predicted run time in seconds."""
+        return self._coefficient(maxdim, thresholded) * n_points ** self._exponent(maxdim)
+
+    def max_points(self, budget: float, maxdim: int, thresholded: bool = False) -> int:
+        """Largest point count predicted to finish within budget seconds."""
+        return int((budget / self._coefficient(maxdim, thresholded)) ** (1.0 / self._exponent(maxdim)))
+
+    def observe(self, n_points: int, maxdim: int, thresholded: bool, seconds: float):
+        if n_points < 2:
+            return
+        key = (maxdim, thresholded)
+        sample = seconds / n_points ** self._exponent(maxdim)
+        current = self._coefficient(maxdim, thresholded)
+        self.coefficients[key] = (1 - self.smoothing) * current + self.smoothing * sample
+
+
+class DiagramSummary:
+    """
+    Scalar summaries of one set of persistence diagrams, computed in a single pass
+    by TopologyAnalyzer.summarize_diagrams.
+    """
+
+    def __init__(self, thresholds, betti, adaptive_thresholds, adaptive_betti,
+                 entropy, total_lifetime, max_lifetime, max_lifetimes):
+        self.thresholds = thresholds
+        self.betti = betti  # {threshold: {"h0": int, ...}}
+        self.adaptive_thresholds = adaptive_thresholds  # {"h0": float, ...}
+        self.adaptive_betti = adaptive_betti
+        self.entropy = entropy
+        self.total_lifetime = total_lifetime
+        self.max_lifetime = max_lifetime
+        self.max_lifetimes = max_lifetimes  # {"h0": float, ...}
+
+    @property
+    def betti_numbers(self) -> dict:
+        """Betti numbers at the first threshold."""
+        return self.betti[self.thresholds[0]]
+
+    def to_dict(self) -> dict:
+        return {
+            "betti": {str(t): b for t, b in self.betti.items()},
+            "adaptive_thresholds": self.adaptive_thresholds,
+            "adaptive_betti": self.adaptive_betti,
+            "entropy": self.entropy,
+            "total_lifetime": self.total_lifetime,
+            "max_lifetime": self.max_lifetime,
+            "max_lifetimes": self.max_lifetimes
+        }
+
+
+class PersistenceVectorizer:
+    """
+    Fixed-length vectorizations of persistence diagrams on a reusable grid:
+    Betti curves (number of bars alive at each filtration value, essential bars included)
+    and persistence images (persistence-weighted Gaussians in birth/persistence coordinates,
+    finite bars only).
+    Grids and Gaussian kernel constants are precomputed once; a batch of windows is
+    turned into one (n_windows, n_features) float32 matrix with array operations only.
+    """
+
+    def __init__(self, dimensions: Sequence[int] = (0, 1), filtration_range=(0.0, 1.0),
+                 birth_range=(0.0, 1.0), persistence_range=(0.0, 1.0), curve_resolution: int = 100,
+                 image_resolution: int = 20, sigma: Optional[float] = None, max_chunk_bars: int = 8192):
+        """
+        :param dimensions: Homology dimensions to vectorize
+        :param filtration_range: (min, max) of the Betti curve grid
+        :param birth_range: (min, max) birth coordinates of the persistence image
+        :param persistence_range: (min, max) persistence coordinates of the persistence image
+        :param curve_resolution: Number of Betti curve samples per dimension
+        :param image_resolution: Persistence image pixels per side
+        :param sigma: Gaussian bandwidth (defaults to two pixels of the persistence axis)
+        :param max_chunk_bars: Bars per chunk when accumulating images, bounds temporary memory
+        """
+        self.dimensions = tuple(dimensions)
+        self.curve_resolution = curve_resolution
+        self.image_resolution = image_resolution
+        self.max_chunk_bars = max_chunk_bars
+        self._sigma = sigma
+        self.set_ranges(filtration_range, birth_range, persistence_range)
+
+    @property
+    def n_features(self) -> int:
+        return len(self.dimensions) * (self.curve_resolution + self.image_resolution ** 2)
+
+    def set_ranges(self, filtration_range, birth_range, persistence_range):
+        """Rebuild the grids and kernel constants for new coordinate ranges."""
+        self.filtration_range = tuple(float(v) for v in filtration_range)
+        self.birth_range = tuple(float(v) for v in birth_range)
+        self.persistence_range = tuple(float(v) for v in persistence_range)
+
+        self.curve_grid = np.linspace(*self.filtration_range, self.curve_resolution)
+
+        res = self.image_resolution
+        birth_edges = np.linspace(*self.birth_range, res + 1)
+        pers_edges = np.linspace(*self.persistence_range, res + 1)
+        self.birth_centers = (birth_edges[:-1] + birth_edges[1:]) / 2
+        self.persistence_centers = (pers_edges[:-1] + pers_edges[1:]) / 2
+        pixel_area = np.diff(birth_edges[:2])[0] * np.diff(pers_edges[:2])[0]
+
+        sigma = self._sigma or 2 * (self.persistence_range[1] - self.persistence_range[0]) / res
+        self.sigma = max(sigma, 1e-12)
+        self._neg_half_inv_var = -0.5 / self.sigma ** 2
+        # Gaussian density normalization times pixel area, so pixels approximate integrated mass
+        self._kernel_scale = pixel_area / (2 * np.pi * self.sigma ** 2)
+        return self
+
+    def fit(self, diagrams_batch):
+        """Set grid ranges from the finite bars of a batch of diagrams."""
+        bars, _, _ = self._flatten(diagrams_batch)
+        if len(bars) == 0:
+            return self
+        persistence = bars[:, 1] - bars[:, 0]
+        return self.set_ranges(
+            (bars[:, 0].min(), bars[:, 1].max()),
+            (bars[:, 0].min(), max(bars[:, 0].max(), bars[:, 0].min() + 1e-9)),
+            (0.0, persistence.max())
+        )
+
+    def _flatten(self, diagrams_batch, essential: bool = False):
+        """
+        Stack the finite bars of every window; returns (bars, window index, dimension slot).
+        With essential=True, bars that never die (e.g. the H0 class of a connected window)
+        are kept too, with an infinite death.
+        """
+        bars, windows, slots = [], [], []
+        for w, diagrams in enumerate(diagrams_batch):
+            for slot, dim in enumerate(self.dimensions):
+                if dim >= len(diagrams):
+                    continue
+                if essential:
+                    dgm = np.asarray(diagrams[dim], dtype=float).reshape(-1, 2)
+                    finite = dgm[np.isfinite(dgm[:, 0]) & (dgm[:, 1] > dgm[:, 0])]
+                else:
+                    finite = TopologyAnalyzer._finite_bars(diagrams[dim])
+                bars.append(finite)
+                windows.append(np.full(len(finite), w))
+                slots.append(np.full(len(finite), slot))
+        if not bars:
+            return np.empty((0, 2)), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.vstack(bars), np.concatenate(windows).astype(np.int64), np.concatenate(slots).astype(np.int64)
+
+    def betti_curves(self, diagrams_batch) -> np.ndarray:
+        """
+        :return: float32 array of shape (n_windows, len(dimensions) * curve_resolution)
+        """
+        n_windows, n_dims, res = len(diagrams_batch), len(self.dimensions), self.curve_resolution
+        # Essential bars count towards the curve (otherwise every H0 curve is one short of beta_0)
+        bars, windows, slots = self._flatten(diagrams_batch, essential=True)
+
+        # A bar is alive on [birth, death): +1 at the first grid point >= birth, -1 at the first >= death.
+        # Infinite deaths land past the last grid point, so essential bars never drop off the curve
+        start = np.searchsorted(self.curve_grid, bars[:, 0], side="left")
+        stop = np.searchsorted(self.curve_grid, bars[:, 1], side="left")
+        row = (windows * n_dims + slots) * (res + 1)
+        size = n_windows * n_dims * (res + 1)
+        diff = np.bincount(row + start, minlength=size) - np.bincount(row + stop, minlength=size)
+        curves = np.cumsum(diff.reshape(n_windows, n_dims, res + 1), axis=-1)[..., :res]
+        return curves.reshape(n_windows, n_dims * res).astype(np.float32)
+
+    def persistence_images(self, diagrams_batch) -> np.ndarray:
+        """
+        :return: float32 array of shape (n_windows, len(dimensions) * image_resolution ** 2)
+        """
+        n_windows, n_dims, res = len(diagrams_batch), len(self.dimensions), self.image_resolution
+        bars, windows, slots = self._flatten(diagrams_batch)
+        images = np.zeros((n_windows * n_dims, res * res), dtype=np.float32)
+        if len(bars) == 0:
+            return images.reshape(n_windows, -1)
+
+        births = bars[:, 0]
+        persistence = bars[:, 1] - bars[:, 0]
+        # Linear weight ramp so short-lived (noise) bars contribute little
+        weights = np.clip(persistence / max(self.persistence_range[1], 1e-12), 0.0, 1.0) * self._kernel_scale
+
+        # Separable Gaussian: per-bar 1-D kernels on each axis, then a weighted outer product
+        kx = np.exp(self._neg_half_inv_var * (self.birth_centers[None, :] - births[:, None]) ** 2)
+        ky = np.exp(self._neg_half_inv_var * (self.persistence_centers[None, :] - persistence[:, None]) ** 2)
+        kx = (kx * weights[:, None]).astype(np.float32)
+        ky = ky.astype(np.float32)
+
+        # Bars are grouped by (window, dimension); sum each group's outer products in bounded chunks
+        groups = windows * n_dims + slots
+        boundaries = np.flatnonzero(np.diff(groups)) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [len(groups)]])
+        chunk_start = 0
+        while chunk_start < len(starts):
+            chunk_end = chunk_start + 1
+            while chunk_end < len(starts) and ends[chunk_end] - starts[chunk_start] <= self.max_chunk_bars:
+                chunk_end += 1
+            lo, hi = starts[chunk_start], ends[chunk_end - 1]
+            outer = (kx[lo:hi, :, None] * ky[lo:hi, None, :]).reshape(hi - lo, res * res)
+            images[groups[starts[chunk_start:chunk_end]]] = np.add.reduceat(outer, starts[chunk_start:chunk_end] - lo, axis=0)
+            chunk_start = chunk_end
+        return images.reshape(n_windows, n_dims * res * res)
+
+    def transform(self, diagrams_batch) -> np.ndarray:
+        """Betti curves followed by persistence images, (n_windows, n_features) float32."""
+        return np.hstack([self.betti_curves(diagrams_batch), self.persistence_images(diagrams_batch)])
+
+
+def compute_persistence_standalone(analyzer_options: dict, point_cloud: np.ndarray,
+                                   cost_coefficients: Optional[dict] = None):
+    """
+    Picklable entry point for process pools: build a stateless analyzer and compute one window.
+    :param cost_coefficients: The caller's PersistenceCostModel.coefficients, so a latency budget
+                              is planned with what the caller has learned rather than the priors
+    :return: Tuple (diagrams, approximation tag, degradation tag)
+    """
+    analyzer = TopologyAnalyzer(**analyzer_options)
+    analyzer.cost_model.coefficients.update(cost_coefficients or {})
+    diagrams = analyzer.compute_persistence(point_cloud)
+    return diagrams, analyzer.last_approximation, analyzer.last_degradation
+
+
+def _persistence_batch_worker(shm_name: str, total_size: int, specs, analyzer_options: dict):
+    """
+    Process-pool task: attach to the shared window buffer and compute persistence for a
+    chunk of windows. specs holds (offset, n_rows, n_cols) per window.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        buffer = np.ndarray((total_size,), dtype=np.float64, buffer=shm.buf)
+        analyzer = TopologyAnalyzer(**analyzer_options)
+        results = []
+        for offset, n_rows, n_cols in specs:
+            window = buffer[offset:offset + n_rows * n_cols].reshape(n_rows, n_cols)
+            results.append([np.array(dgm) for dgm in analyzer.compute_persistence(window)])
+        # Views into shared memory must be released before closing it
+        del window, buffer
+        return results
+    finally:
+        shm.close()
+
+
+def _memoize_feature(method):
+    """
+    Memoize a diagram-derived feature on the analyzer's DiagramCache entry.
+    Only diagrams returned from the cache (or stored in it) are memoized.
+    """
+    @functools.wraps(method)
+    def wrapper(self, diagrams, *args, **kwargs):
+        features = self.cache.features(diagrams) if self.cache is not None else None
+        if features is None:
+            return method(self, diagrams, *args, **kwargs)
+        key = (method.__name__, repr(args), repr(sorted(kwargs.items())))
+        if key not in features:
+            features[key] = method(self, diagrams, *args, **kwargs)
+        return features[key]
+    return wrapper
+
+
 class TopologyAnalyzer:
-    def __init__(self, max_dimension: int = 2):
+    # rips: full Vietoris-Rips on the point cloud passed in
+    # incremental: Rips on a rolling distance matrix fed by update()
+    # mst: exact H0 only, from an incrementally maintained minimum spanning tree
+    # sublevel/superlevel: H0 of the scalar sequence itself (first column), no point cloud needed.
+    #   Superlevel diagrams are reported in negated values so lifetimes stay positive.
+    ENGINES = ("rips", "incremental", "mst", "sublevel", "superlevel")
+    STREAMING_ENGINES = ("incremental", "mst")
+    SCALAR_ENGINES = ("sublevel", "superlevel")
+    H0_ENGINES = ("mst", "sublevel", "superlevel")
+    # greedy: Ripser's greedy permutation (n_perm); maxmin: farthest-point coreset from a random start
+    LANDMARK_METHODS = ("greedy", "maxmin")
+    # Degradation ladder used under a latency budget, from exact to cheapest
+    DEGRADATION_LEVELS = ("full", "reduced_dimension", "thresholded", "subsampled")
+
+    def __init__(self, max_dimension: Optional[int] = None, engine: str = "rips", window_size: int = 50,
+                 n_landmarks: Optional[int] = None, landmark_method: str = "greedy",
+                 latency_budget_ms: Optional[float] = None, thresh_quantile: float = 0.5,
+                 cache: Optional[DiagramCache] = None):
         """
         Initialize the TDA engine.
-        :param max_dimension: Maximum homology dimension to compute (0=components, 1=loops, 2=voids)
+        :param max_dimension: Maximum homology dimension to compute (0=components, 1=loops, 2=voids).
+                              Defaults to 2, or 0 for H0-only engines.
+        :param engine: Persistence engine, one of ENGINES
+        :param window_size: Sliding window length for streaming engines
+        :param n_landmarks: If set, Rips windows larger than this are approximated on a landmark subset
+        :param landmark_method: Landmark selection, one of LANDMARK_METHODS
+        :param latency_budget_ms: Per-window deadline; Rips runs predicted to exceed it are degraded
+                                  (lower maxdim, then a Rips threshold, then subsampling)
+        :param thresh_quantile: Quantile of pairwise distances used as Rips threshold when degrading
+        :param cache: Optional (possibly shared) DiagramCache for point-cloud windows; derived
+                      features are memoized with the cached diagrams, treat them as read-only
         """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown TDA engine '{engine}', expected one of {self.ENGINES}")
+        if landmark_method not in self.LANDMARK_METHODS:
+            raise ValueError(f"Unknown landmark method '{landmark_method}', expected one of {self.LANDMARK_METHODS}")
+        if max_dimension is None:
+            max_dimension = 0 if engine in self.H0_ENGINES else 2
+        if engine in self.H0_ENGINES and max_dimension != 0:
+            raise ValueError(f"Engine '{engine}' only computes H0, use max_dimension=0")
         self.max_dim = max_dimension
+        self.engine = engine
+        self.window_size = window_size
+        self._distances = RollingDistanceMatrix(window_size) if engine == "incremental" else None
+        self._mst = IncrementalMST(window_size) if engine == "mst" else None
+        self.n_landmarks = n_landmarks
+        self.landmark_method = landmark_method
+        # Per-thread tags of the last compute_persistence call, so concurrent analyses don't mix them up
+        self._local = threading.local()
+        # Guards streaming window state between ingest and off-loop analysis
+        self._state_lock = threading.Lock()
+        self.latency_budget_ms = latency_budget_ms
+        self.thresh_quantile = thresh_quantile
+        self.cost_model = PersistenceCostModel()
+        self.cache = cache
+
+    @property
+    def last_approximation(self) -> Optional[dict]:
+        """Approximation details of this thread's last compute_persistence call (None when exact)."""
+        return getattr(self._local, "approximation", None)
+
+    @last_approximation.setter
+    def last_approximation(self, value: Optional[dict]):
+        self._local.approximation = value
+
+    @property
+    def last_degradation(self) -> Optional[dict]:
+        """Degradation tag of this thread's last budgeted Ripser run (None without a budget)."""
+        return getattr(self._local, "degradation", None)
+
+    @last_degradation.setter
+    def last_degradation(self, value: Optional[dict]):
+        self._local.degradation = value
+
+    def stateless_options(self) -> dict:
+        """Constructor options for an equivalent analyzer without streaming state or cache."""
+        return {
+            "max_dimension": self.max_dim,
+            "engine": "rips" if self.engine == "incremental" else self.engine,
+            "n_landmarks": self.n_landmarks,
+            "landmark_method": self.landmark_method,
+            "latency_budget_ms": self.latency_budget_ms,
+            "thresh_quantile": self.thresh_quantile
+        }
+
+    @property
+    def is_streaming(self) -> bool:
+        """True if the engine keeps its own window state fed through update()."""
+        return self.engine in self.STREAMING_ENGINES
 
-    def compute_persistence(self, point_cloud: np.ndarray):
+    @property
+    def is_scalar(self) -> bool:
+        """True if the engine works on the scalar value sequence rather than a point cloud."""
+        return self.engine in self.SCALAR_ENGINES
+
+    def update(self, point):
+        """
+        Feed one point into the streaming engine's window.
+        No-op for stateless engines.
+        """
+        with self._state_lock:
+            if self._distances is not None:
+                self._distances.push(point)
+            if self._mst is not None:
+                self._mst.push(point)
+
+    def reset(self):
+        """Drop any streaming window state."""
+        with self._state_lock:
+            if self._distances is not None:
+                self._distances.reset()
+            if self._mst is not None:
+                self._mst.reset()
+
+    def compute_persistence(self, point_cloud: Optional[np.ndarray] = None):
         """
         Compute persistent homology for a given point cloud.
-        :param point_cloud: Numpy array of shape (n_samples, n_features)
+        :param point_cloud: Numpy array of shape (n_samples, n_features).
+                            Streaming engines may pass None to use the window fed through update().
         :return: Persistence diagrams
         """
+        self.last_approximation = None
+        self.last_degradation = None
+        if point_cloud is None:
+            if not self.is_streaming:
+                raise ValueError(f"Engine '{self.engine}' requires a point cloud")
+            return self._compute_streaming_persistence()
+
+        if self.cache is None:
+            return self._compute_point_cloud_persistence(point_cloud)
+
+        cached = self.cached_persistence(point_cloud)
+        if cached is not None:
+            diagrams, self.last_approximation, self.last_degradation = cached
+            return diagrams
+
+        diagrams = self._compute_point_cloud_persistence(point_cloud)
+        if len(diagrams) == 0:
+            return diagrams
+        return self._store(point_cloud, diagrams, self.last_approximation, self.last_degradation)
+
+    def _cache_key(self, point_cloud: np.ndarray) -> str:
+        return self.cache.make_key(
+            point_cloud, engine=self.engine, maxdim=self.max_dim, n_landmarks=self.n_landmarks,
+            landmark_method=self.landmark_method, latency_budget_ms=self.latency_budget_ms,
+            thresh_quantile=self.thresh_quantile
+        )
+
+    def _store(self, point_cloud: np.ndarray, diagrams, approximation, degradation):
+        entry = self.cache.put(self._cache_key(point_cloud), list(diagrams), {
+            "approximation": approximation,
+            "degradation": degradation
+        })
+        return entry.diagrams
+
+    def cached_persistence(self, point_cloud: np.ndarray) -> Optional[tuple]:
+        """Cached (diagrams, approximation tag, degradation tag) of a window, or None (also without a cache)."""
+        if self.cache is None:
+            return None
+        entry = self.cache.get(self._cache_key(point_cloud))
+        if entry is None:
+            return None
+        return entry.diagrams, entry.meta.get("approximation"), entry.meta.get("degradation")
+
+    def record_persistence(self, point_cloud: np.ndarray, persistence: tuple) -> tuple:
+        """
+        Take in the result of compute_persistence_standalone run elsewhere (e.g. a process pool):
+        its timing feeds the cost model and the diagrams are cached, as a local run would do.
+        :param persistence: Tuple (diagrams, approximation tag, degradation tag)
+        :return: The same tuple, holding the cached diagrams if they were stored
+        """
+        diagrams, approximation, degradation = persistence
+        if degradation is not None:
+            self.cost_model.observe(degradation["n_used"], degradation["maxdim"],
+                                    degradation["thresh"] is not None, degradation["elapsed_ms"] / 1000.0)
+        if self.cache is not None and len(diagrams) > 0:
+            diagrams = self._store(point_cloud, diagrams, approximation, degradation)
+        return diagrams, approximation, degradation
+
+    def _compute_point_cloud_persistence(self, point_cloud: np.ndarray):
         if point_cloud.shape[0] < self.max_dim + 2:
             logger.warning("Not enough points for TDA computation")
             return []
 
+        if self.is_scalar:
+            values = point_cloud[:, 0] if point_cloud.ndim > 1 else point_cloud
+            return [sublevel_persistence(values if self.engine == "sublevel" else -values)]
+
+        if self.engine == "mst":
+            distances = np.sqrt(np.sum((point_cloud[:, None, :] - point_cloud[None, :, :]) ** 2, axis=-1))
+            return [h0_diagram_from_weights(minimum_spanning_tree_weights(distances))]
+
         try:
             # Compute persistence diagrams using Ripser
             # return_inverse=True allows us to map generators back to points (future feature)
-            diagrams = ripser(point_cloud, maxdim=self.max_dim)['dgms']
+            diagrams = self._run_ripser(point_cloud)
             return diagrams
         except Exception as e:
             logger.error(f"TDA Computation failed: {str(e)}")
             return []
 
+    def compute_persistence_batch(self, windows, max_workers: Optional[int] = None,
+                                  chunk_size: Optional[int] = None, executor: Optional[Executor] = None) -> list:
+        """
+        Compute persistence for many windows across a process pool.
+        Windows are copied once into a shared-memory block that workers read in place,
+        so only offsets and the resulting diagrams cross the process boundary.
+        :param windows: Sequence of point clouds, each of shape (n_samples, n_features)
+        :param max_workers: Pool size when no executor is given, otherwise the size of `executor`
+                            (used to size the chunks; defaults to the CPU count)
+        :param chunk_size: Windows per task (defaults to about four tasks per worker)
+        :param executor: Existing ProcessPoolExecutor to reuse across batches
+        :return: List of persistence diagrams, in input order
+        """
+        windows = [np.ascontiguousarray(w, dtype=np.float64) for w in windows]
+        if not windows:
+            return []
+        windows = [w.reshape(len(w), -1) for w in windows]
+
+        sizes = [w.size for w in windows]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(int)
+        total_size = int(sum(sizes))
+        specs = [(int(o), w.shape[0], w.shape[1]) for o, w in zip(offsets, windows)]
+
+        workers = max_workers or os.cpu_count() or 1
+        chunk_size = chunk_size or max(1, math.ceil(len(windows) / (workers * 4)))
+        # Workers rebuild a stateless analyzer; streaming state does not apply to standalone windows
+        options = self.stateless_options()
+
+        shm = shared_memory.SharedMemory(create=True, size=max(total_size * 8, 1))
+        own_executor = executor is None
+        try:
+            buffer = np.ndarray((total_size,), dtype=np.float64, buffer=shm.buf)
+            for (offset, _, _), window, size in zip(specs, windows, sizes):
+                buffer[offset:offset + size] = window.ravel()
+            del buffer
+
+            if own_executor:
+                executor = ProcessPoolExecutor(max_workers=workers)
+            futures = [
+                executor.submit(_persistence_batch_worker, shm.name, total_size, specs[i:i + chunk_size], options)
+                for i in range(0, len(specs), chunk_size)
+            ]
+            results = []
+            for future in futures:
+                results.extend(future.result())
+            return results
+        finally:
+            if own_executor and executor is not None:
+                executor.shutdown()
+            shm.close()
+            shm.unlink()
+
+    def _compute_streaming_persistence(self):
+        """Run Ripser on the rolling distance matrix instead of recomputing it from points."""
+        # Snapshot under the lock, then compute without blocking ingest
+        with self._state_lock:
+            window = self._mst if self._mst is not None else self._distances
+            if len(window) < self.max_dim + 2:
+                logger.warning("Not enough points for TDA computation")
+                return []
+            if self._mst is not None:
+                return [self._mst.diagram()]
+            distances = self._distances.matrix().copy()
+
+        try:
+            return self._run_ripser(distances, distance_matrix=True)
+        except Exception as e:
+            logger.error(f"TDA Computation failed: {str(e)}")
+            return []
+
+    def _run_ripser(self, data: np.ndarray, distance_matrix: bool = False):
+        """
+        Ripser on the full window, or on landmarks when the window exceeds n_landmarks.
+        With a latency budget, the run is degraded until its predicted cost fits.
+        """
+        n_points = data.shape[0]
+        plan = self._plan_computation(n_points)
+        thresh = self._estimate_thresh(data, distance_matrix) if plan["thresholded"] else np.inf
+
+        start = time.perf_counter()
+        if plan["n_used"] < n_points:
+            result = self.compute_landmark_persistence(
+                data, n_landmarks=plan["n_used"], distance_matrix=distance_matrix,
+                maxdim=plan["maxdim"], thresh=thresh
+            )
+            self.last_approximation = {k: v for k, v in result.items() if k not in ("dgms", "landmarks")}
+            diagrams = result["dgms"]
+        else:
+            diagrams = _ripser.ripser(data, maxdim=plan["maxdim"], thresh=thresh, distance_matrix=distance_matrix)['dgms']
+        elapsed = time.perf_counter() - start
+
+        if self.latency_budget_ms is not None:
+            self.cost_model.observe(plan["n_used"], plan["maxdim"], plan["thresholded"], elapsed)
+            self.last_degradation = {
+                "level": plan["level"],
+                "name": self.DEGRADATION_LEVELS[plan["level"]],
+                "maxdim": plan["maxdim"],
+                "thresh": float(thresh) if plan["thresholded"] else None,
+                "n_points": int(n_points),
+                "n_used": int(plan["n_used"]),
+                "budget_ms": float(self.latency_budget_ms),
+                "predicted_ms": plan["predicted"] * 1000.0,
+                "elapsed_ms": elapsed * 1000.0
+            }
+            # Keep one diagram per requested dimension so Betti keys stay stable
+            diagrams = list(diagrams) + [np.empty((0, 2))] * (self.max_dim - plan["maxdim"])
+        return diagrams
+
+    def _plan_computation(self, n_points: int) -> dict:
+        """Pick the first degradation level whose predicted cost fits the latency budget."""
+        n_used = min(n_points, self.n_landmarks) if self.n_landmarks is not None else n_points
+        plan = {"level": 0, "maxdim": self.max_dim, "thresholded": False, "n_used": n_used}
+        if self.latency_budget_ms is None:
+            plan["predicted"] = 0.0
+            return plan
+
+        budget = self.latency_budget_ms / 1000.0
+        reduced = min(self.max_dim, 1)
+        candidates = [(0, self.max_dim, False)]
+        if reduced < self.max_dim:
+            candidates.append((1, reduced, False))
+        candidates.append((2, reduced, True))
+        for level, maxdim, thresholded in candidates:
+            predicted = self.cost_model.predict(n_used, maxdim, thresholded)
+            if predicted <= budget:
+                return {**plan, "level": level, "maxdim": maxdim, "thresholded": thresholded, "predicted": predicted}
+
+        # Nothing fits on the whole window: subsample to the largest affordable landmark set
+        n_affordable = max(self.cost_model.max_points(budget, reduced, True), reduced + 2, 10)
+        n_used = min(n_used, n_affordable)
+        return {
+            "level": 3, "maxdim": reduced, "thresholded": True, "n_used": n_used,
+            "predicted": self.cost_model.predict(n_used, reduced, True)
+        }
+
+    def _estimate_thresh(self, data: np.ndarray, distance_matrix: bool, n_pairs: int = 256) -> float:
+        """Rips threshold from a quantile of randomly sampled pairwise distances."""
+        rng = np.random.default_rng()
+        i = rng.integers(data.shape[0], size=n_pairs)
+        j = rng.integers(data.shape[0], size=n_pairs)
+        if distance_matrix:
+            sample = data[i, j]
+        else:
+            sample = np.sqrt(np.sum((data[i] - data[j]) ** 2, axis=1))
+        return float(np.quantile(sample, self.thresh_quantile))
+
+    def compute_landmark_persistence(self, data: np.ndarray, n_landmarks: Optional[int] = None,
+                                     method: Optional[str] = None, distance_matrix: bool = False,
+                                     maxdim: Optional[int] = None, thresh: float = np.inf) -> dict:
+        """
+        Approximate Rips persistence on a landmark subset of the window.
+        The landmarks cover every point within cover_radius, so the diagrams are within
+        bottleneck distance 2 * cover_radius of the exact ones. With a finite thresh, bars
+        alive at the threshold come back infinite and no bound holds: bottleneck_bound is None.
+        :param data: Point cloud, or a distance matrix if distance_matrix=True
+        :param n_landmarks: Number of landmarks (defaults to self.n_landmarks)
+        :param method: Landmark selection, one of LANDMARK_METHODS (defaults to self.landmark_method)
+        :param maxdim: Maximum homology dimension (defaults to self.max_dim)
+        :param thresh: Rips threshold passed to Ripser
+        :return: Dictionary with dgms, landmark indices, cover_radius, thresh and bottleneck_bound
+        """
+        n_landmarks = min(n_landmarks or self.n_landmarks or data.shape[0], data.shape[0])
+        method = method or self.landmark_method
+        maxdim = self.max_dim if maxdim is None else maxdim
+
+        if method == "greedy":
+            result = _ripser.ripser(data, maxdim=maxdim, thresh=thresh, distance_matrix=distance_matrix, n_perm=n_landmarks)
+            diagrams = result['dgms']
+            landmarks = result['idx_perm']
+            cover_radius = float(result['r_cover'])
+        elif method == "maxmin":
+            if distance_matrix:
+                landmarks, cover_radius = maxmin_landmarks(n_landmarks, distances=data)
+                subset = data[np.ix_(landmarks, landmarks)]
+            else:
+                landmarks, cover_radius = maxmin_landmarks(n_landmarks, points=data)
+                subset = data[landmarks]
+            diagrams = _ripser.ripser(subset, maxdim=maxdim, thresh=thresh, distance_matrix=distance_matrix)['dgms']
+        else:
+            raise ValueError(f"Unknown landmark method '{method}', expected one of {self.LANDMARK_METHODS}")
+
+        return {
+            "dgms": diagrams,
+            "landmarks": landmarks,
+            "method": method,
+            "n_points": int(data.shape[0]),
+            "n_landmarks": int(n_landmarks),
+            "cover_radius": cover_radius,
+            "thresh": float(thresh) if np.isfinite(thresh) else None,
+            "bottleneck_bound": None if np.isfinite(thresh) else 2.0 * cover_radius
+        }
+
+    @_memoize_feature
     def extract_betti_numbers(self, diagrams, threshold: float = 0.1, adaptive: bool = False, sigma: float = 2.0) -> dict:
         """
         Extract Betti numbers (counts of features) from diagrams.
@@ -73,6 +1010,7 @@ class TopologyAnalyzer:
             
         return betti
 
+    @_memoize_feature
     def compute_total_lifetime(self, diagrams) -> float:
         """
         Compute the sum of lifetimes of all features in the diagrams.
@@ -87,6 +1025,7 @@ class TopologyAnalyzer:
                 total_lifetime += np.sum(lifetimes)
         return float(total_lifetime)
 
+    @_memoize_feature
     def compute_persistence_entropy(self, diagrams) -> float:
         """
         Compute the Shannon entropy of the persistence diagram.
@@ -112,6 +1051,171 @@ class TopologyAnalyzer:
             
         return float(entropy)
 
+    @_memoize_feature
+    def summarize_diagrams(self, diagrams, thresholds: Sequence[float] = (0.1,), sigma: float = 2.0) -> DiagramSummary:
+        """
+        Compute lifetimes once for every dimension and derive Betti numbers at several
+        thresholds, adaptive thresholds, entropy, total and max lifetime in one vectorized pass.
+        Results match extract_betti_numbers, compute_persistence_entropy and compute_total_lifetime.
+        :param diagrams: Output from compute_persistence
+        :param thresholds: Lifetime thresholds for Betti counts
+        :param sigma: Standard deviations above mean for adaptive thresholds
+        :return: DiagramSummary
+        """
+        thresholds = tuple(float(t) for t in thresholds)
+        n_dims = len(diagrams)
+        bars = [np.asarray(dgm, dtype=float).reshape(-1, 2) for dgm in diagrams]
+        dims = np.repeat(np.arange(n_dims), [len(b) for b in bars])
+        bars = np.vstack(bars) if n_dims else np.empty((0, 2))
+        lifetimes = bars[:, 1] - bars[:, 0]
+
+        finite = np.isfinite(lifetimes)
+        finite_dims = dims[finite]
+        finite_lifetimes = lifetimes[finite]
+        counts = np.bincount(finite_dims, minlength=n_dims)
+        sums = np.bincount(finite_dims, weights=finite_lifetimes, minlength=n_dims)
+        means = np.divide(sums, counts, out=np.zeros(n_dims), where=counts > 0)
+        sq_dev = np.bincount(finite_dims, weights=(finite_lifetimes - means[finite_dims]) ** 2, minlength=n_dims)
+        stds = np.sqrt(np.divide(sq_dev, counts, out=np.zeros(n_dims), where=counts > 0))
+        adaptive = np.where(counts > 0, means + sigma * stds, thresholds[0])
+
+        # Infinite lifetimes exceed every threshold, which covers the essential H0 class
+        above = lifetimes[:, None] > np.asarray(thresholds)[None, :]
+        betti_counts = np.zeros((n_dims, len(thresholds)), dtype=np.int64)
+        np.add.at(betti_counts, dims, above)
+        adaptive_counts = np.bincount(dims, weights=lifetimes > adaptive[dims], minlength=n_dims)
+
+        max_lifetimes = np.zeros(n_dims)
+        if len(finite_lifetimes):
+            np.maximum.at(max_lifetimes, finite_dims, finite_lifetimes)
+
+        total = float(np.sum(finite_lifetimes))
+        entropy = 0.0
+        if total > 0:
+            probs = finite_lifetimes / total
+            probs = probs[probs > 0]
+            entropy = float(-np.sum(probs * np.log(probs)))
+
+        keys = [f"h{dim}" for dim in range(n_dims)]
+        return DiagramSummary(
+            thresholds=thresholds,
+            betti={t: {k: int(betti_counts[d, i]) for d, k in enumerate(keys)} for i, t in enumerate(thresholds)},
+            adaptive_thresholds={k: float(adaptive[d]) for d, k in enumerate(keys)},
+            adaptive_betti={k: int(adaptive_counts[d]) for d, k in enumerate(keys)},
+            entropy=entropy,
+            total_lifetime=total,
+            max_lifetime=float(max_lifetimes.max()) if n_dims else 0.0,
+            max_lifetimes={k: float(max_lifetimes[d]) for d, k in enumerate(keys)}
+        )
+
+    def _vectorizer_for(self, diagrams_batch, vectorizer: Optional[PersistenceVectorizer]) -> PersistenceVectorizer:
+        if vectorizer is not None:
+            return vectorizer
+        return PersistenceVectorizer(dimensions=range(self.max_dim + 1)).fit(diagrams_batch)
+
+    def compute_betti_curves(self, diagrams_batch, vectorizer: Optional[PersistenceVectorizer] = None) -> np.ndarray:
+        """
+        Betti curves for a batch of windows.
+        :param diagrams_batch: List of compute_persistence outputs, one per window
+        :param vectorizer: Reusable grid; fitted to this batch if omitted
+        :return: float32 matrix of shape (n_windows, n_features)
+        """
+        return self._vectorizer_for(diagrams_batch, vectorizer).betti_curves(diagrams_batch)
+
+    def compute_persistence_images(self, diagrams_batch, vectorizer: Optional[PersistenceVectorizer] = None) -> np.ndarray:
+        """
+        Persistence images for a batch of windows.
+        :param diagrams_batch: List of compute_persistence outputs, one per window
+        :param vectorizer: Reusable grid; fitted to this batch if omitted
+        :return: float32 matrix of shape (n_windows, n_features)
+        """
+        return self._vectorizer_for(diagrams_batch, vectorizer).persistence_images(diagrams_batch)
+
+    @staticmethod
+    def _finite_bars(dgm) -> np.ndarray:
+        """
+        Return the finite (birth, death) pairs of a single diagram as an (n, 2) array.
+        Empty diagrams (including 1-D ``np.array([])``) yield an empty (0, 2) array.
+        """
+        dgm = np.asarray(dgm, dtype=float)
+        if dgm.size == 0:
+            return np.empty((0, 2))
+        dgm = dgm.reshape(-1, 2)
+        return dgm[np.isfinite(dgm[:, 1])]
+
+    @staticmethod
+    def _landscape_grid(bars: np.ndarray, resolution: int) -> np.ndarray:
+        """Evaluation grid spanning the bars with 10% padding on each side."""
+        min_birth = np.min(bars[:, 0])
+        max_death = np.max(bars[:, 1])
+        padding = (max_death - min_birth) * 0.1
+        return np.linspace(min_birth - padding, max_death + padding, resolution)
+
+    @staticmethod
+    def _landscape_layers_on_grid(bars: np.ndarray, grid: np.ndarray, num_layers: int) -> np.ndarray:
+        """
+        Evaluate the first ``num_layers`` landscape layers of ``bars`` on ``grid``.
+        Every tent function max(0, min(t-b, d-t)) is evaluated at once by broadcasting,
+        and the k-th layer is the k-th largest tent value at each grid point.
+        :return: Array of shape (num_layers, len(grid))
+        """
+        layers = np.zeros((num_layers, len(grid)))
+        if len(bars) == 0:
+            return layers
+
+        tents = np.minimum(grid[None, :] - bars[:, 0, None], bars[:, 1, None] - grid[None, :])
+        np.maximum(tents, 0.0, out=tents)
+
+        n_bars = len(bars)
+        if n_bars > num_layers:
+            # Only the top-k values per column are needed, avoid a full sort
+            tents = np.partition(tents, n_bars - num_layers, axis=0)[n_bars - num_layers:]
+        top = -np.sort(-tents, axis=0)
+        layers[:len(top)] = top
+        return layers
+
+    @_memoize_feature
+    def compute_landscape_layers(self, diagrams, num_layers: int = 1, resolution: int = 100,
+                                 dimensions: Optional[Sequence[int]] = None):
+        """
+        Compute the first k persistence landscape layers for several homology dimensions
+        on one shared grid, in a single vectorized pass per dimension.
+        :param diagrams: Output from compute_persistence
+        :param num_layers: Number of landscape layers (k) to return per dimension
+        :param resolution: Number of grid points
+        :param dimensions: Homology dimensions to include (defaults to every dimension present)
+        :return: Tuple (grid, {dim: ndarray of shape (num_layers, resolution)}), grid is None if no finite features
+        """
+        if dimensions is None:
+            dimensions = range(len(diagrams))
+        dimensions = [dim for dim in dimensions if dim < len(diagrams)]
+
+        bars = {dim: self._finite_bars(diagrams[dim]) for dim in dimensions}
+        non_empty = [b for b in bars.values() if len(b) > 0]
+        if not non_empty:
+            return None, {}
+
+        grid = self._landscape_grid(np.vstack(non_empty), resolution)
+        layers = {dim: self._landscape_layers_on_grid(b, grid, num_layers) for dim, b in bars.items()}
+        return grid, layers
+
+    @_memoize_feature
+    def compute_persistence_landscapes(self, diagrams, num_layers: int = 3, resolution: int = 100,
+                                       dimensions: Optional[Sequence[int]] = None) -> dict:
+        """
+        Multi-layer persistence landscapes for H0/H1/H2 on one shared grid.
+        Returns x coordinates and, per dimension, a list of layers for plotting.
+        """
+        grid, layers = self.compute_landscape_layers(diagrams, num_layers, resolution, dimensions)
+        if grid is None:
+            return {"x": [], "layers": {}}
+
+        return {
+            "x": grid.tolist(),
+            "layers": {f"h{dim}": vals.tolist() for dim, vals in layers.items()}
+        }
+
+    @_memoize_feature
     def compute_persistence_landscape(self, diagrams, resolution: int = 100) -> dict:
         """
         Compute the first layer of the persistence landscape for H1 features.
@@ -120,35 +1224,14 @@ class TopologyAnalyzer:
         # Focus on H1 (loops) for now as they are most interesting for anomalies
         if len(diagrams) < 2:
             return {"x": [], "y": []}
-            
-        dgm = diagrams[1] # H1
-        if len(dgm) == 0:
-            return {"x": [], "y": []}
-            
-        # Filter finite features
-        finite_dgm = dgm[dgm[:, 1] != np.inf]
+
+        finite_dgm = self._finite_bars(diagrams[1])  # H1
         if len(finite_dgm) == 0:
             return {"x": [], "y": []}
-            
-        # Define range for the landscape
-        min_birth = np.min(finite_dgm[:, 0])
-        max_death = np.max(finite_dgm[:, 1])
-        padding = (max_death - min_birth) * 0.1
-        t_vals = np.linspace(min_birth - padding, max_death + padding, resolution)
-        landscape_vals = np.zeros(resolution)
-        
-        # Compute 1st Landscape Layer (max envelope of triangle functions)
-        # For each point (b, d), f(t) = max(0, min(t-b, d-t))
-        for i, t in enumerate(t_vals):
-            vals = []
-            for pt in finite_dgm:
-                b, d = pt[0], pt[1]
-                val = max(0, min(t - b, d - t))
-                vals.append(val)
-            
-            if vals:
-                landscape_vals[i] = max(vals) # 1st layer is the maximum
-                
+
+        t_vals = self._landscape_grid(finite_dgm, resolution)
+        landscape_vals = self._landscape_layers_on_grid(finite_dgm, t_vals, 1)[0]
+
         return {
             "x": t_vals.tolist(),
             "y": landscape_vals.tolist()
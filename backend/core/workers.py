@@ -0,0 +1,432 @@
+import asyncio
+import bisect
+import glob
+import hashlib
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait as wait_connections
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .executor import AnalysisOverloaded
+
+logger = logging.getLogger("topoforge.workers")
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping keys (source IDs) onto nodes (worker indices).
+    Each node owns `replicas` virtual points, so adding or removing a node only moves
+    about 1/N of the keys, and a given key always lands on the same node.
+    """
+
+    def __init__(self, nodes, replicas: int = 64):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._nodes: List[Any] = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    def add(self, node):
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._nodes.insert(index, node)
+
+    def remove(self, node):
+        keep = [(p, n) for p, n in zip(self._points, self._nodes) if n != node]
+        self._points = [p for p, _ in keep]
+        self._nodes = [n for _, n in keep]
+
+    def node_for(self, key) -> Any:
+        if not self._points:
+            raise LookupError("Hash ring has no nodes")
+        index = bisect.bisect(self._points, self._hash(str(key))) % len(self._points)
+        return self._nodes[index]
+
+
+class SharedValueRing:
+    """
+    Single-producer, single-consumer ring of float64 values in shared memory.
+    The parent writes a batch and sends its (offset, count) over the worker's control
+    queue; the worker copies it out. Space is released when the parent receives the
+    batch's result, so unread values are never overwritten.
+    """
+
+    def __init__(self, capacity: int, name: Optional[str] = None):
+        self.capacity = capacity
+        create = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=create, size=capacity * 8)
+        self._values = np.ndarray((capacity,), dtype=np.float64, buffer=self._shm.buf)
+        self._head = 0
+        self.in_use = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self.in_use
+
+    def write(self, values: np.ndarray) -> int:
+        """Copy values in at the head; returns their offset. Caller checks free space first."""
+        n = len(values)
+        offset = self._head
+        first = min(n, self.capacity - offset)
+        self._values[offset:offset + first] = values[:first]
+        self._values[:n - first] = values[first:]
+        self._head = (offset + n) % self.capacity
+        self.in_use += n
+        return offset
+
+    def read(self, offset: int, n: int) -> np.ndarray:
+        """Owned copy of n values starting at offset."""
+        first = min(n, self.capacity - offset)
+        return np.concatenate((self._values[offset:offset + first], self._values[:n - first]))
+
+    def release(self, n: int):
+        self.in_use -= n
+
+    def close(self, unlink: bool = False):
+        self._values = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+class _CollectingLogWriter:
+    """Stands in for AnomalyLogWriter in a worker: logs ride back with the results."""
+
+    def __init__(self):
+        self.logs: List[Dict[str, Any]] = []
+
+    def submit(self, log: Dict[str, Any]) -> bool:
+        self.logs.append(log)
+        return True
+
+    def drain(self) -> List[Dict[str, Any]]:
+        logs, self.logs = self.logs, []
+        return logs
+
+
+def _worker_main(index: int, n_workers: int, ring_name: str, ring_capacity: int, commands, results,
+                 options: Dict[str, Any]):
+    """
+    Worker process loop: owns the processors of the streams hashed onto it and handles
+    their commands strictly in arrival order, which preserves per-source ordering.
+    """
+    from .cache import DiagramCache
+    from .registry import ProcessorRegistry
+    from .snapshots import read_snapshot, write_snapshot
+
+    cache_entries = options.pop("cache_entries", 0)
+    snapshot_path = options.pop("snapshot_path", None)
+    log_writer = _CollectingLogWriter()
+    registry = ProcessorRegistry(cache=DiagramCache(max_entries=cache_entries) if cache_entries > 0 else None,
+                                 log_writer=log_writer, **options)
+    if snapshot_path:
+        # Read every worker's file so streams follow the hash ring if the worker count changed
+        ring_of_workers = HashRing(range(n_workers))
+        for path in sorted(glob.glob(f"{glob.escape(snapshot_path)}.*")):
+            state = read_snapshot(path)
+            if state is not None:
+                registry.restore(state, accept=lambda stream_id: ring_of_workers.node_for(stream_id) == index)
+    ring = SharedValueRing(ring_capacity, name=ring_name)
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            command = commands.get()
+            if command is None:
+                break
+            kind, request_id, stream_id = command[:3]
+            try:
+                if kind == "config":
+                    registry.configure(stream_id, command[3])
+                    results.send((request_id, index, 0, "ok", None, []))
+                    continue
+                if kind == "snapshot":
+                    write_snapshot(f"{snapshot_path}.{index}", registry.snapshot())
+                    results.send((request_id, index, 0, "ok", len(registry), []))
+                    continue
+
+                offset, n, hop = command[3:]
+                values = ring.read(offset, n)
+                processor = registry.get(stream_id)
+                if kind == "batch":
+                    output = loop.run_until_complete(processor.ingest_batch(values, hop=hop))
+                else:
+                    processor.ingest_many(values)
+                    output = loop.run_until_complete(processor.process_window())
+                results.send((request_id, index, n, "ok", output, log_writer.drain()))
+            except Exception as e:
+                n = command[4] if kind in ("batch", "events") else 0
+                results.send((request_id, index, n, "error", f"{type(e).__name__}: {e}", log_writer.drain()))
+    finally:
+        loop.close()
+        ring.close()
+
+
+class StreamWorkerPool:
+    """
+    Shards streams across worker processes so topology work scales with cores.
+    Source IDs are consistent-hashed onto workers; each worker owns the DataProcessors
+    of its streams and processes their batches in order. Event values travel through a
+    per-worker shared-memory ring, commands through a per-worker queue and results through
+    a per-worker pipe, and results are resolved back onto the caller's event loop.
+    Anomaly logs produced in the workers are handed to log_writer in this process.
+    A worker that dies is restarted on a fresh ring: its pending requests fail, and the new
+    process restores its streams from snapshot_path (if set) and gets their config again.
+    """
+
+    def __init__(self, n_workers: int = 2, ring_capacity: int = 1 << 16, log_writer=None, **processor_options):
+        """
+        :param n_workers: Number of worker processes
+        :param ring_capacity: Values each worker's shared ring can hold in flight
+        :param log_writer: AnomalyLogWriter that receives the workers' anomaly logs (None drops them)
+        :param processor_options: ProcessorRegistry/DataProcessor options for the workers
+                                  (picklable values only; pass cache_entries instead of a cache, and
+                                  snapshot_path to restore on start and enable snapshot())
+        """
+        if n_workers < 1:
+            raise ValueError("n_workers must be positive")
+        self.n_workers = n_workers
+        self.ring_capacity = ring_capacity
+        self.processor_options = processor_options
+        self.log_writer = log_writer
+        self.ring = HashRing(range(n_workers))
+        self._context = mp.get_context("spawn")
+        self._rings: List[SharedValueRing] = []
+        self._commands = []
+        self._processes = []
+        # Read ends of the workers' result pipes. One pipe per worker (rather than a shared
+        # queue) so a killed worker can't leave a lock held that blocks the others
+        self._results = []
+        self._stopping = False
+        self._reader: Optional[threading.Thread] = None
+        # request_id -> (loop, future, worker, ring holding its values or None, values in flight)
+        self._pending: Dict[int, tuple] = {}
+        self._request_ids = itertools.count()
+        self._lock = threading.Lock()
+        # Config sent through configure(), replayed to a restarted worker
+        self._configs: Dict[Any, Dict[str, Any]] = {}
+        self._closing = False
+        self.submitted = 0
+        self.rejected = 0
+        self.restarts = 0
+
+    def start(self):
+        if self._processes:
+            return
+        self._closing = self._stopping = False
+        for index in range(self.n_workers):
+            ring, commands, results, process = self._spawn(index)
+            self._rings.append(ring)
+            self._commands.append(commands)
+            self._results.append(results)
+            self._processes.append(process)
+        self._reader = threading.Thread(target=self._read_results, name="topoforge-worker-results", daemon=True)
+        self._reader.start()
+        logger.info(f"Started {self.n_workers} stream workers")
+
+    def _spawn(self, index: int):
+        ring = SharedValueRing(self.ring_capacity)
+        commands = self._context.Queue()
+        results, worker_end = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self.n_workers, ring.name, self.ring_capacity, commands, worker_end,
+                  dict(self.processor_options)),
+            name=f"topoforge-stream-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        worker_end.close()
+        return ring, commands, results, process
+
+    def worker_for(self, stream_id) -> int:
+        return self.ring.node_for(stream_id if stream_id not in (None, "") else "default")
+
+    async def process_batch(self, stream_id, values, hop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Ingest_batch on the stream's worker; one result per evaluated hop."""
+        return await self._submit("batch", stream_id, values, hop)
+
+    async def process_events(self, stream_id, values) -> Dict[str, Any]:
+        """Ingest values on the stream's worker and run its (cadence-aware) process_window."""
+        return await self._submit("events", stream_id, values, None)
+
+    async def configure(self, stream_id, config: Dict[str, Any]):
+        worker = self.worker_for(stream_id)
+        with self._lock:
+            # The reader thread replays these when it restarts a worker
+            self._configs.setdefault(stream_id, {}).update(config)
+        future = self._send(worker, lambda request_id: ("config", request_id, stream_id, dict(config)))
+        await future
+
+    async def snapshot(self) -> int:
+        """Have every worker write its streams to snapshot_path.<worker>. Returns the streams saved."""
+        snapshot_path = self.processor_options.get("snapshot_path")
+        if not snapshot_path:
+            raise RuntimeError("StreamWorkerPool was created without snapshot_path")
+        futures = [self._send(worker, lambda request_id: ("snapshot", request_id, None))
+                   for worker in range(self.n_workers)]
+        saved = sum(await asyncio.gather(*futures))
+        # Files of workers that no longer exist would otherwise be restored again later
+        for path in glob.glob(f"{glob.escape(snapshot_path)}.*"):
+            suffix = path.rsplit(".", 1)[-1]
+            if suffix.isdigit() and int(suffix) >= self.n_workers:
+                os.unlink(path)
+        return saved
+
+    async def _submit(self, kind: str, stream_id, values, hop):
+        if not self._processes:
+            raise RuntimeError("StreamWorkerPool is not started")
+        values = np.ascontiguousarray(values, dtype=np.float64).ravel()
+        n = len(values)
+        if n > self.ring_capacity:
+            raise ValueError(f"Batch of {n} values exceeds the worker ring capacity ({self.ring_capacity})")
+        worker = self.worker_for(stream_id)
+        future = self._send(worker, lambda request_id: (kind, request_id, stream_id, None, n, hop), values)
+        self.submitted += 1
+        return await future
+
+    def _send(self, worker: int, make_command, values: Optional[np.ndarray] = None) -> "asyncio.Future":
+        """
+        Write values (if any) to the worker's ring, register a future and queue the command,
+        all under the lock so a worker restart never sees half of it.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request_id = next(self._request_ids)
+        n = 0 if values is None else len(values)
+        with self._lock:
+            ring = self._rings[worker] if n else None
+            command = make_command(request_id)
+            if ring is not None:
+                if ring.free < n:
+                    self.rejected += 1
+                    raise AnalysisOverloaded(f"Stream worker {worker} has {ring.in_use} values in flight")
+                # Fill in the ring offset (4th field of batch/events commands)
+                command = command[:3] + (ring.write(values),) + command[4:]
+            self._pending[request_id] = (loop, future, worker, ring, n)
+            self._commands[worker].put(command)
+        return future
+
+    def _read_results(self):
+        last_check = time.monotonic()
+        while not self._stopping:
+            try:
+                if time.monotonic() - last_check >= 0.5:
+                    # Checked even while other workers keep the pipes busy
+                    last_check = time.monotonic()
+                    self._restart_dead_workers()
+                for connection in wait_connections(list(self._results), timeout=0.5):
+                    self._receive(connection)
+            except Exception:
+                # This thread resolves every request, so it must outlive any one failure
+                logger.exception("Stream worker result reader failed")
+                time.sleep(0.5)
+
+    def _receive(self, connection):
+        try:
+            message = connection.recv()
+        except (EOFError, OSError):
+            # The worker exited; _restart_dead_workers replaces its pipe
+            return
+        request_id, worker, n, status, payload, logs = message
+        with self._lock:
+            # Requests already failed by a worker restart are gone (and their values released)
+            entry = self._pending.pop(request_id, None)
+            if entry is not None and entry[3] is not None:
+                entry[3].release(entry[4])
+        if entry is not None:
+            entry[0].call_soon_threadsafe(self._resolve, entry[1], status, payload, logs)
+
+    def _resolve(self, future, status, payload, logs=()):
+        if self.log_writer is not None:
+            for log in logs:
+                self.log_writer.submit(log)
+        if future.done():
+            return
+        if status == "ok":
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(f"Stream worker failed: {payload}"))
+
+    def _restart_dead_workers(self):
+        """Fail the requests of workers that exited, release their values and start replacements."""
+        for index, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+            if self._closing:
+                with self._lock:
+                    entries = self._pop_pending(index)
+                self._fail(entries)
+                continue
+            logger.error(f"Stream worker {index} exited (code {process.exitcode}), restarting it")
+            # Spawned outside the lock so _send isn't blocked meanwhile; whatever it sends to the
+            # dead worker until the swap below is failed with the rest
+            replacement = self._spawn(index)
+            with self._lock:
+                entries = self._pop_pending(index)
+                old_ring, old_results = self._rings[index], self._results[index]
+                # A fresh ring, queue and pipe: whatever the dead worker left behind is discarded
+                (self._rings[index], self._commands[index], self._results[index],
+                 self._processes[index]) = replacement
+                for stream_id, config in self._configs.items():
+                    if self.worker_for(stream_id) == index:
+                        # Fire and forget: no pending entry, so the reply is ignored
+                        self._commands[index].put(("config", None, stream_id, dict(config)))
+            old_ring.close(unlink=True)
+            old_results.close()
+            self.restarts += 1
+            self._fail(entries)
+
+    def _pop_pending(self, index: int) -> List[tuple]:
+        """Remove the pending entries of a worker. Caller holds the lock."""
+        failed = [rid for rid, entry in self._pending.items() if entry[2] == index]
+        return [self._pending.pop(rid) for rid in failed]
+
+    def _fail(self, entries: List[tuple]):
+        for loop, future, worker, _, _ in entries:
+            loop.call_soon_threadsafe(self._resolve, future, "error", f"worker {worker} exited")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.n_workers,
+            "alive": sum(process.is_alive() for process in self._processes),
+            "in_flight": [ring.in_use for ring in self._rings],
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "restarts": self.restarts
+        }
+
+    def shutdown(self, timeout: float = 5.0):
+        self._closing = True
+        for commands in self._commands:
+            commands.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._stopping = True
+        if self._reader is not None:
+            self._reader.join(timeout)
+            self._reader = None
+        for results in self._results:
+            results.close()
+        for ring in self._rings:
+            ring.close(unlink=True)
+        self._rings, self._commands, self._results, self._processes = [], [], [], []
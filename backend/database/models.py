@@ -12,6 +12,14 @@ class AnomalyLogModel:
         result = await database[self.collection_name].insert_one(data)
         return str(result.inserted_id)
 
+    async def create_logs(self, logs: List[Dict[str, Any]]) -> int:
+        """Insert many logs in one round trip; unordered, so one bad document doesn't stop the rest."""
+        if not logs:
+            return 0
+        database = db_connection.get_database()
+        result = await database[self.collection_name].insert_many(logs, ordered=False)
+        return len(result.inserted_ids)
+
     async def get_logs_by_timeframe(self, start_date: datetime, end_date: datetime):
         database = db_connection.get_database()
         cursor = database[self.collection_name].find({
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from .models import AnomalyLogModel
+
+logger = logging.getLogger("topoforge.database.writer")
+
+
+class AnomalyLogWriter:
+    """
+    Background writer for anomaly logs.
+    submit() only enqueues, so logging never sits on the request path. A single task
+    drains the bounded queue and writes with insert_many(ordered=False) whenever
+    batch_size logs are waiting or flush_interval_s has passed since the oldest one.
+    When the queue is full new logs are dropped and counted rather than blocking.
+    """
+
+    def __init__(self, model: Optional[AnomalyLogModel] = None, max_queue: int = 10000,
+                 batch_size: int = 500, flush_interval_s: float = 1.0):
+        """
+        :param model: Model used for inserts (defaults to AnomalyLogModel())
+        :param max_queue: Logs allowed to wait; beyond that submit() drops
+        :param batch_size: Flush as soon as this many logs are waiting
+        :param flush_interval_s: Flush at the latest this long after the oldest waiting log arrived
+        """
+        self.model = model or AnomalyLogModel()
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        # Items are (enqueue time, log), so lag can be measured at write time
+        self._queue: "asyncio.Queue[tuple]" = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._flushing = False
+        # Logs already taken off the queue when the task was cancelled
+        self._leftover: List[tuple] = []
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def submit(self, log: Dict[str, Any]) -> bool:
+        """Enqueue a log without waiting. Returns False if it was dropped."""
+        try:
+            self._queue.put_nowait((time.monotonic(), log))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Anomaly log queue full, {self.dropped} logs dropped so far")
+            return False
+        self.submitted += 1
+        return True
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and write whatever is still queued."""
+        if self._task is not None:
+            self._stopping = True
+            # An insert in progress is allowed to finish; only waiting for logs is interrupted
+            if not self._flushing:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        leftover, self._leftover = self._leftover, []
+        await self._flush(leftover)
+        while not self._queue.empty():
+            await self._flush(self._take(self.batch_size))
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def _run(self):
+        while not self._stopping:
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = batch[0][0] + self.flush_interval_s
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                self._leftover = batch
+                raise
+            batch.extend(self._take(self.batch_size - len(batch)))
+            self._flushing = True
+            try:
+                await self._flush(batch)
+            finally:
+                self._flushing = False
+
+    def _take(self, n: int) -> List[tuple]:
+        items = []
+        while len(items) < n and not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        return items
+
+    async def _flush(self, batch: List[tuple]):
+        if not batch:
+            return
+        lag_ms = (time.monotonic() - batch[0][0]) * 1000.0
+        try:
+            inserted = await self.model.create_logs([log for _, log in batch])
+        except Exception as e:
+            # Unordered bulk inserts report partial success on the error
+            details = getattr(e, "details", None) or {}
+            inserted = details.get("nInserted", 0)
+            logger.error(f"Failed to write {len(batch) - inserted} of {len(batch)} anomaly logs: {e}")
+        self.written += inserted
+        self.failed += len(batch) - inserted
+        self.batches += 1
+        self.last_lag_ms = lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queue_depth,
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_lag_ms": self.last_lag_ms,
+            "max_lag_ms": self.max_lag_ms
+        }
@@ -1,7 +1,9 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+import asyncio
 import logging
+import os
 from contextlib import asynccontextmanager
 
 # Import internal modules
@@ -13,15 +15,37 @@ from .api.routes import auth, anomalies, users
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("topoforge")
 
+# Heavy ML/TDA libraries are imported lazily (core.lazy); warm them up in the background
+# after startup so the first analysed event doesn't pay for the imports
+PRELOAD_MODULES = ("scipy.sparse.csgraph", "sklearn.ensemble", "ripser", "torch")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    if os.getenv("TOPOFORGE_PRELOAD", "1") != "0":
+        preload(PRELOAD_MODULES)
     await db_connection.connect()
     from .database.indexes import create_indexes
     await create_indexes()
     logger.info("Database connected and indexes checked")
+    anomaly_log_writer.start()
+    if stream_workers is not None:
+        stream_workers.start()
+    elif snapshot_path:
+        state = read_snapshot(snapshot_path)
+        if state is not None:
+            logger.info(f"Restored {processors.restore(state)} streams from {snapshot_path}")
+    snapshot_task = asyncio.create_task(snapshot_periodically()) if snapshot_path and snapshot_interval_s > 0 else None
     yield
     # Shutdown
+    if snapshot_task is not None:
+        snapshot_task.cancel()
+    if snapshot_path:
+        await save_snapshot()
+    if stream_workers is not None:
+        stream_workers.shutdown()
+    analysis_executor.shutdown(wait=False)
+    await anomaly_log_writer.stop()
     await db_connection.disconnect()
     logger.info("Database disconnected")
 
@@ -55,7 +79,7 @@ app.include_router(realtime.router)
 app.include_router(sources.router)
 
 # WebSocket Connection Manager (Preserved/Refined)
-from typing import List
+from typing import List, Optional
 import json
 
 class ConnectionManager:
@@ -76,8 +100,117 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 # Initialize Processor
-from .core.processor import DataProcessor
-processor = DataProcessor(window_size=50)
+from .core.registry import ProcessorRegistry
+from .core.workers import StreamWorkerPool
+from .core.snapshots import read_snapshot, write_snapshot
+from .core.executor import AnalysisExecutor, AnalysisOverloaded
+from .core.payloads import parse_event_batch, PayloadError
+from .core.cache import DiagramCache
+from .core.metrics import metrics
+from .core.lazy import preload, import_report
+from .database.writer import AnomalyLogWriter
+# Anomaly logs are queued and bulk-inserted in the background instead of one insert per window
+anomaly_log_writer = AnomalyLogWriter(
+    max_queue=int(os.getenv("TOPOFORGE_ANOMALY_LOG_QUEUE", "10000")),
+    batch_size=int(os.getenv("TOPOFORGE_ANOMALY_LOG_BATCH", "500")),
+    flush_interval_s=float(os.getenv("TOPOFORGE_ANOMALY_LOG_FLUSH_S", "1.0"))
+)
+# Shared by every analyzer so replays and duplicate windows reuse diagrams; 0 entries disables it
+cache_entries = int(os.getenv("TOPOFORGE_DIAGRAM_CACHE_ENTRIES", "256"))
+diagram_cache = DiagramCache(max_entries=cache_entries) if cache_entries > 0 else None
+# Topology/ML work runs off the event loop; excess load is rejected rather than queued forever
+analysis_executor = AnalysisExecutor(
+    kind=os.getenv("TOPOFORGE_ANALYSIS_EXECUTOR", "thread"),
+    max_workers=int(os.getenv("TOPOFORGE_ANALYSIS_WORKERS", "2")),
+    max_queue=int(os.getenv("TOPOFORGE_ANALYSIS_QUEUE", "32"))
+)
+# One processor (window, calibration, config) per source; idle sources are evicted.
+# TOPOFORGE_TDA_ENGINE=incremental reuses the previous window's distance matrix per event
+processors = ProcessorRegistry(
+    max_streams=int(os.getenv("TOPOFORGE_MAX_STREAMS", "1024")),
+    idle_ttl_s=float(os.getenv("TOPOFORGE_STREAM_IDLE_TTL_S", "900")),
+    window_size=50,
+    executor=analysis_executor,
+    engine=os.getenv("TOPOFORGE_TDA_ENGINE", "rips"),
+    cache=diagram_cache,
+    log_writer=anomaly_log_writer
+)
+# Warm restarts: stream state (window, fitted models, config) is snapshotted to
+# TOPOFORGE_SNAPSHOT_PATH every TOPOFORGE_SNAPSHOT_INTERVAL_S (0 = only at shutdown) and restored on startup
+snapshot_path = os.getenv("TOPOFORGE_SNAPSHOT_PATH")
+snapshot_interval_s = float(os.getenv("TOPOFORGE_SNAPSHOT_INTERVAL_S", "300"))
+# TOPOFORGE_STREAM_WORKERS=N shards sources across N worker processes instead of the local registry
+n_stream_workers = int(os.getenv("TOPOFORGE_STREAM_WORKERS", "0"))
+stream_workers = StreamWorkerPool(
+    n_workers=n_stream_workers,
+    log_writer=anomaly_log_writer,
+    window_size=50,
+    engine=os.getenv("TOPOFORGE_TDA_ENGINE", "rips"),
+    cache_entries=cache_entries,
+    max_streams=int(os.getenv("TOPOFORGE_MAX_STREAMS", "1024")),
+    idle_ttl_s=float(os.getenv("TOPOFORGE_STREAM_IDLE_TTL_S", "900")),
+    snapshot_path=snapshot_path
+) if n_stream_workers > 0 else None
+
+async def save_snapshot():
+    try:
+        if stream_workers is not None:
+            saved = await stream_workers.snapshot()
+        else:
+            # Taken on the loop so it is consistent; serialized in a thread so the loop keeps serving
+            state = processors.snapshot()
+            await asyncio.to_thread(write_snapshot, snapshot_path, state)
+            saved = len(state["streams"])
+        logger.info(f"Snapshotted {saved} streams to {snapshot_path}")
+    except Exception as e:
+        logger.error(f"Failed to write snapshot: {e}")
+
+async def snapshot_periodically():
+    while True:
+        await asyncio.sleep(snapshot_interval_s)
+        await save_snapshot()
+
+def _component_gauges():
+    """Gauges read from the long-lived components at scrape time."""
+    if diagram_cache is not None:
+        for key, value in diagram_cache.stats().items():
+            yield f"topoforge_diagram_cache_{key}", value, {}
+    executor_stats = analysis_executor.stats()
+    for key in ("running", "queued", "completed", "rejected", "failed"):
+        yield f"topoforge_analysis_executor_{key}", executor_stats[key], {}
+    for key, value in anomaly_log_writer.stats().items():
+        yield f"topoforge_anomaly_log_{key}", value, {}
+    yield "topoforge_streams", len(processors), {}
+    for module, seconds in import_report(top=20):
+        yield "topoforge_import_seconds", seconds, {"module": module}
+    if stream_workers is not None:
+        stats = stream_workers.stats()
+        yield "topoforge_stream_workers_alive", stats["alive"], {}
+        yield "topoforge_stream_workers_rejected", stats["rejected"], {}
+        yield "topoforge_stream_workers_restarts", stats["restarts"], {}
+        for worker, in_flight in enumerate(stats["in_flight"]):
+            yield "topoforge_stream_worker_in_flight", in_flight, {"worker": worker}
+
+metrics.register_collector(_component_gauges)
+
+async def configure_stream(stream_id, config: dict):
+    if stream_workers is not None:
+        await stream_workers.configure(stream_id, config)
+    else:
+        processors.configure(stream_id, config)
+
+async def process_event(stream_id, event: dict) -> dict:
+    """Ingest one event into its stream and run that stream's analysis."""
+    if stream_workers is not None:
+        try:
+            values = [float(event.get("value", 0))]
+        except (TypeError, ValueError):
+            logger.error(f"Ingestion error: invalid value {event.get('value')!r}")
+            values = []
+        return await stream_workers.process_events(stream_id, values)
+    processor = processors.get(stream_id)
+    processor.ingest(event)
+    return await processor.process_window()
 
 @app.get("/")
 async def root():
@@ -85,6 +218,8 @@ async def root():
 
 @app.websocket("/ws/stream")
 async def websocket_endpoint(websocket: WebSocket):
+    # Stream defaults to ?source_id=...; individual messages may override it with "source_id"
+    stream_id = websocket.query_params.get("source_id")
     await manager.connect(websocket)
     try:
         while True:
@@ -94,7 +229,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 
                 # Handle Configuration Updates
                 if message.get("type") == "config":
-                    processor.update_config(message.get("payload", {}))
+                    await configure_stream(message.get("source_id", stream_id), message.get("payload", {}))
                     continue
                 
                 # Handle Data Events (Default)
@@ -104,10 +239,14 @@ async def websocket_endpoint(websocket: WebSocket):
                 else:
                     event = message
 
-                processor.ingest(event)
-                
                 # Run analysis
-                result = await processor.process_window()
+                try:
+                    with metrics.time("topoforge_request_seconds", route="ws"):
+                        result = await process_event(event.get("source_id", stream_id), event)
+                except AnalysisOverloaded as e:
+                    # Tell the client to slow down instead of stalling the loop
+                    await websocket.send_text(json.dumps({"type": "overloaded", "detail": str(e)}))
+                    continue
                 
                 response = {
                     "type": "analysis",
@@ -118,8 +257,8 @@ async def websocket_endpoint(websocket: WebSocket):
                 # Broadcast via WebSocket
                 await websocket.send_text(json.dumps(response))
                 
-                # Broadcast via SSE if anomaly
-                if result.get("is_anomaly"):
+                # Broadcast via SSE if anomaly (only for fresh evaluations, not repeated intermediate results)
+                if result.get("is_anomaly") and result.get("evaluated", True):
                     await realtime.broadcast_event(result)
                 
             except json.JSONDecodeError:
@@ -130,10 +269,51 @@ async def websocket_endpoint(websocket: WebSocket):
 
 @app.post("/api/ingest")
 async def ingest_data(data: dict):
-    processor.ingest(data)
-    result = await processor.process_window()
+    try:
+        with metrics.time("topoforge_request_seconds", route="ingest"):
+            result = await process_event(data.get("source_id"), data)
+    except AnalysisOverloaded as e:
+        return JSONResponse(status_code=503, content={"message": "Analysis overloaded", "detail": str(e)},
+                            headers={"Retry-After": "1"})
     return result
 
+@app.post("/api/ingest/batch")
+async def ingest_batch(request: Request, hop: Optional[int] = None, source_id: Optional[str] = None):
+    """
+    Ingest many events of one source in one request, as NDJSON (application/x-ndjson),
+    a JSON array of events, or a columnar {"value": [...], "timestamp": [...]} body.
+    Returns one analysis per `hop` events; without `hop`, the stream's batch_hop config
+    applies (by default one analysis of the whole batch).
+    """
+    try:
+        values, _ = parse_event_batch(await request.body(), request.headers.get("content-type"))
+    except PayloadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if hop is not None and hop < 1:
+        raise HTTPException(status_code=400, detail="hop must be positive")
+
+    try:
+        with metrics.time("topoforge_request_seconds", route="ingest_batch"):
+            if stream_workers is not None:
+                results = await stream_workers.process_batch(source_id, values, hop=hop)
+            else:
+                results = await processors.get(source_id).ingest_batch(values, hop=hop)
+    except AnalysisOverloaded as e:
+        return JSONResponse(status_code=503, content={"message": "Analysis overloaded", "detail": str(e)},
+                            headers={"Retry-After": "1"})
+    return {"ingested": int(len(values)), "results": results}
+
+@app.get("/api/streams")
+async def stream_stats():
+    if stream_workers is not None:
+        return stream_workers.stats()
+    return processors.stats()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Per-stage latency histograms, window/queue histograms and component gauges (Prometheus text format)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Global error: {exc}")
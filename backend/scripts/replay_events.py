@@ -0,0 +1,296 @@
+"""
+Replay historical event files through DataProcessor, e.g. to re-score after tuning thresholds.
+Runs without the web server or a database: anomalies are written to the output file only.
+
+Run from backend/:
+    python scripts/replay_events.py events.jsonl more.csv.gz -o scores.parquet \\
+        --workers 4 --hop 10 --config '{"anomaly_threshold": 70}'
+
+Input files are JSONL/NDJSON or CSV (optionally gzipped) with one event per line/row,
+oldest first per source. Events are grouped by source and ingested in batches; with
+--workers, sources are sharded across worker processes (per-source order is kept).
+"""
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import logging
+import math
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.registry import ProcessorRegistry, DEFAULT_STREAM
+from core.workers import StreamWorkerPool
+from core.executor import AnalysisOverloaded
+
+logger = logging.getLogger("topoforge.replay")
+
+
+def open_text(path: Path) -> io.TextIOBase:
+    if path.suffix == ".gz":
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def read_events(path: Path) -> Iterator[Dict[str, Any]]:
+    """Events of one file in order; the format follows the suffix (.jsonl/.ndjson/.csv, optionally .gz)."""
+    suffixes = [s for s in path.suffixes if s != ".gz"]
+    is_csv = bool(suffixes) and suffixes[-1] == ".csv"
+    with open_text(path) as handle:
+        if is_csv:
+            yield from csv.DictReader(handle)
+            return
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"{path}:{line_number}: skipping invalid JSON ({e})")
+
+
+def group_chunk(events: List[Dict[str, Any]], source_field: str, value_field: str,
+                time_field: str) -> Tuple[Dict[str, Tuple[List[float], List[Any]]], int]:
+    """
+    Split a chunk of events into per-source (values, timestamps), keeping order.
+    Events with a missing, non-numeric or non-finite value are skipped; their count is returned
+    alongside, since one NaN in a window would fail its analysis (and score the rest as anomalies).
+    """
+    grouped: Dict[str, Tuple[List[float], List[Any]]] = {}
+    skipped = 0
+    for event in events:
+        raw = event.get(value_field)
+        try:
+            value = float(raw) if raw not in (None, "") else math.nan
+        except (TypeError, ValueError):
+            value = math.nan
+        if not math.isfinite(value):
+            skipped += 1
+            continue
+        values, timestamps = grouped.setdefault(event.get(source_field) or DEFAULT_STREAM, ([], []))
+        values.append(value)
+        timestamps.append(event.get(time_field))
+    return grouped, skipped
+
+
+def result_row(source_id: str, event_index: int, event_time: Any, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flat output record of one evaluated window."""
+    betti = result["betti_numbers"]
+    topology = result["topology_features"]
+    scores = result["scores"]
+    return {
+        "source_id": str(source_id),
+        "event_index": event_index,
+        "event_timestamp": None if event_time is None else str(event_time),
+        "anomaly_score": result["anomaly_score"],
+        "is_anomaly": bool(result["is_anomaly"]),
+        "score_betti": scores["betti"],
+        "score_entropy": scores["entropy"],
+        "score_ml": scores["ml"],
+        "betti_h0": int(betti.get("h0", 0)),
+        "betti_h1": int(betti.get("h1", 0)),
+        "betti_h2": int(betti.get("h2", 0)),
+        "entropy": topology["entropy"],
+        "total_lifetime": topology["total_lifetime"],
+        "max_lifetime": topology["max_lifetime"],
+        "risk_level": result["security_analysis"]["risk_level"],
+        "window_size": result["window_size"]
+    }
+
+
+class JsonlOutput:
+
+    def __init__(self, path: Path):
+        self._handle = sys.stdout if str(path) == "-" else open(path, "w", encoding="utf-8")
+
+    def write(self, rows: List[Dict[str, Any]]):
+        self._handle.writelines(json.dumps(row) + "\n" for row in rows)
+
+    def close(self):
+        if self._handle is not sys.stdout:
+            self._handle.close()
+
+
+# Column types of result_row, so chunks whose optional columns are all null still share a schema
+PARQUET_COLUMNS = [
+    ("source_id", "string"), ("event_index", "int64"), ("event_timestamp", "string"),
+    ("anomaly_score", "float64"), ("is_anomaly", "bool"), ("score_betti", "float64"),
+    ("score_entropy", "float64"), ("score_ml", "float64"), ("betti_h0", "int64"), ("betti_h1", "int64"),
+    ("betti_h2", "int64"), ("entropy", "float64"), ("total_lifetime", "float64"),
+    ("max_lifetime", "float64"), ("risk_level", "string"), ("window_size", "int64")
+]
+
+
+class ParquetOutput:
+    """Writes one row group per chunk so memory stays bounded."""
+
+    def __init__(self, path: Path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow); use a .jsonl output instead")
+        self._pa = pyarrow
+        self._path = path
+        self._schema = pyarrow.schema([(name, pyarrow.type_for_alias(kind)) for name, kind in PARQUET_COLUMNS])
+        self._writer = None
+
+    def write(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        table = self._pa.Table.from_pylist(rows, schema=self._schema)
+        if self._writer is None:
+            self._writer = self._pa.parquet.ParquetWriter(self._path, self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class Replayer:
+    """Feeds per-source batches to a local registry or to sharded worker processes."""
+
+    def __init__(self, args: argparse.Namespace):
+        options = dict(
+            window_size=args.window_size,
+            engine=args.engine,
+            default_config=json.loads(args.config) if args.config else None,
+            max_streams=args.max_streams,
+            idle_ttl_s=0,
+            persist_anomalies=False
+        )
+        self.hop = args.hop
+        self.anomalies_only = args.anomalies_only
+        self.pool = None
+        self.registry = None
+        if args.workers > 0:
+            # Two chunks can be in flight on one worker while the next is being read
+            self.pool = StreamWorkerPool(n_workers=args.workers, ring_capacity=2 * args.chunk_size, **options)
+            self.pool.start()
+        else:
+            self.registry = ProcessorRegistry(**options)
+        # Events ingested per source so far, and the event count at each source's last evaluation,
+        # to map results back to event positions
+        self.positions: Dict[str, int] = {}
+        self.evaluated_at: Dict[str, int] = {}
+        self.events = 0
+        self.skipped = 0
+        self.windows = 0
+        self.anomalies = 0
+
+    def dispatch(self, grouped: Dict[str, Tuple[List[float], List[Any]]]) -> "asyncio.Future":
+        """Start processing one chunk; the returned future resolves to its output rows."""
+        tasks = []
+        for source_id, (values, timestamps) in grouped.items():
+            start = self.positions.get(source_id, 0)
+            self.positions[source_id] = start + len(values)
+            self.events += len(values)
+            # Scheduled in order, so each worker receives a source's batches in order
+            tasks.append(asyncio.ensure_future(self._process(source_id, values, timestamps, start)))
+        return asyncio.gather(*tasks)
+
+    async def _process(self, source_id: str, values: List[float], timestamps: List[Any], start: int):
+        if self.pool is not None:
+            while True:
+                try:
+                    results = await self.pool.process_batch(source_id, values, hop=self.hop)
+                    break
+                except AnalysisOverloaded:
+                    await asyncio.sleep(0.01)
+        else:
+            results = await self.registry.get(source_id).ingest_batch(values, hop=self.hop)
+
+        rows = []
+        # A source's batches resolve in order, so its evaluation position advances in order too
+        position = self.evaluated_at.get(source_id, 0)
+        for result in results:
+            position += result["events_since_eval"]
+            self.windows += 1
+            self.anomalies += bool(result["is_anomaly"])
+            if self.anomalies_only and not result["is_anomaly"]:
+                continue
+            rows.append(result_row(source_id, position - 1, timestamps[position - 1 - start], result))
+        self.evaluated_at[source_id] = position
+        return rows
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def chunks(paths: List[Path], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for path in paths:
+        for event in read_events(path):
+            chunk.append(event)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+async def replay(args: argparse.Namespace):
+    output_path = Path(args.output)
+    output = ParquetOutput(output_path) if output_path.suffix == ".parquet" else JsonlOutput(output_path)
+    replayer = Replayer(args)
+    started = time.perf_counter()
+    in_flight = None
+    try:
+        for chunk in chunks([Path(p) for p in args.inputs], args.chunk_size):
+            grouped, skipped = group_chunk(chunk, args.source_field, args.value_field, args.time_field)
+            replayer.skipped += skipped
+            pending = replayer.dispatch(grouped)
+            if in_flight is not None:
+                output.write([row for rows in await in_flight for row in rows])
+            in_flight = pending
+        if in_flight is not None:
+            output.write([row for rows in await in_flight for row in rows])
+    finally:
+        output.close()
+        replayer.close()
+
+    elapsed = time.perf_counter() - started
+    if replayer.skipped:
+        logger.warning(f"Skipped {replayer.skipped} events with a missing or non-finite '{args.value_field}'")
+    logger.info(
+        f"Replayed {replayer.events} events from {len(replayer.positions)} sources in {elapsed:.1f}s "
+        f"({replayer.events / max(elapsed, 1e-9):.0f} events/s): "
+        f"{replayer.windows} windows, {replayer.anomalies} anomalies"
+    )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay historical event files through the TopoForge pipeline.")
+    parser.add_argument("inputs", nargs="+", help="JSONL/NDJSON or CSV event files (optionally .gz)")
+    parser.add_argument("-o", "--output", default="-", help="Output .jsonl or .parquet file ('-' for stdout JSONL)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (0 processes everything in this process)")
+    parser.add_argument("--window-size", type=int, default=50)
+    parser.add_argument("--hop", type=int, default=1, help="Events between evaluations per source")
+    parser.add_argument("--engine", default="rips", help="TDA engine (rips, incremental, mst, sublevel, superlevel)")
+    parser.add_argument("--config", help="Processor config as JSON, e.g. '{\"anomaly_threshold\": 70}'")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Events read per batch")
+    parser.add_argument("--max-streams", type=int, default=100_000, help="Sources kept live per process")
+    parser.add_argument("--source-field", default="source_id")
+    parser.add_argument("--value-field", default="value")
+    parser.add_argument("--time-field", default="timestamp")
+    parser.add_argument("--anomalies-only", action="store_true", help="Only write anomalous windows")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    asyncio.run(replay(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
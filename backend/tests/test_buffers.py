@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from core.buffers import RingBuffer, JitterPool
+from core.processor import DataProcessor
+
+
+class TestRingBuffer:
+
+    def test_ordered_view_matches_deque_semantics(self):
+        buffer = RingBuffer(capacity=4, n_features=2)
+        rows = np.arange(20, dtype=float).reshape(10, 2)
+        for row in rows[:6]:
+            buffer.append(row)
+        np.testing.assert_array_equal(buffer.view(), rows[2:6])
+
+        buffer.extend(rows[6:9])
+        np.testing.assert_array_equal(buffer.view(), rows[5:9])
+        np.testing.assert_array_equal(buffer.last(2), rows[7:9])
+        assert len(buffer) == 4
+
+        # Oversized batches keep only the newest rows
+        buffer.extend(np.vstack([rows, rows]))
+        np.testing.assert_array_equal(np.array(buffer), rows[6:10])
+
+    def test_view_is_zero_copy_and_read_only(self):
+        buffer = RingBuffer(capacity=3, n_features=1, dtype=np.float32)
+        buffer.extend([[1.0], [2.0]])
+        view = buffer.view()
+        assert view.dtype == np.float32
+        assert np.shares_memory(view, buffer._data)
+        with pytest.raises(ValueError):
+            view[0, 0] = 5.0
+
+    def test_jitter_pool_spans_blocks(self):
+        pool = JitterPool(scale=1.0, block_size=8, seed=0)
+        draws = np.concatenate([[pool.next()], pool.draw(20)])
+        assert draws.shape == (21,)
+        assert len(np.unique(draws)) == 21
+        # The sequence only depends on the seed, not on how it is drawn
+        np.testing.assert_array_equal(draws, JitterPool(scale=1.0, block_size=8, seed=0).draw(21))
+
+    def test_repeated_values_stay_distinct(self):
+        processor = DataProcessor(window_size=20)
+        processor.ingest_many(np.ones(20))
+        assert len(np.unique(processor.event_buffer.view(), axis=0)) == 20
+
+
+class TestBatchedIngest:
+
+    def test_ingest_many_matches_single_ingest(self):
+        values = np.sin(np.arange(30) / 5)
+        single = DataProcessor(window_size=20, engine="sublevel")
+        for v in values:
+            single.ingest({"value": v})
+        batched = DataProcessor(window_size=20, engine="sublevel")
+        assert batched.ingest_many(values) == 30
+
+        np.testing.assert_array_equal(batched.event_buffer.view(), single.event_buffer.view())
+        assert batched.is_calibrated
+
+
+class TestEvaluationCadence:
+
+    @pytest.mark.asyncio
+    async def test_hop_size_reuses_last_result(self):
+        processor = DataProcessor(window_size=20, engine="sublevel")
+        processor.update_config({"hop_size": "5"})
+        assert processor.config["hop_size"] == 5
+
+        results = []
+        for i in range(30):
+            processor.ingest({"value": np.sin(i / 4)})
+            results.append(await processor.process_window())
+
+        evaluated = [i for i, r in enumerate(results) if r.get("evaluated")]
+        assert evaluated == [9, 14, 19, 24, 29]
+        intermediate = results[12]
+        assert intermediate["evaluated"] is False
+        assert intermediate["events_since_eval"] == 3
+        assert intermediate["anomaly_score"] == results[9]["anomaly_score"]
+        assert 0.0 <= intermediate["incremental_score"] <= 100.0
+
+    @pytest.mark.asyncio
+    async def test_time_cadence_and_validation(self):
+        processor = DataProcessor(window_size=20, engine="sublevel")
+        processor.update_config({"hop_size": 0, "eval_interval_ms": 60000, "landscape_layers": "bad"})
+        assert processor.config["landscape_layers"] == 1
+        processor.update_config({"anomaly_threshold": "nan", "eval_interval_ms": float("inf")})
+        assert processor.config["anomaly_threshold"] == 65.0
+        assert processor.config["eval_interval_ms"] == 60000
+        processor.update_config({"anomaly_threshold": "inf"})
+        assert processor.config["anomaly_threshold"] == float("inf")
+
+        processor.ingest_many(np.arange(20.0))
+        assert (await processor.process_window())["evaluated"] is True
+        processor.ingest({"value": 3.0})
+        assert (await processor.process_window())["evaluated"] is False
+        assert (await processor.process_window(force=True))["evaluated"] is True
+
+        processor.update_config({"eval_interval_ms": 0})
+        processor.ingest({"value": 4.0})
+        assert (await processor.process_window())["evaluated"] is True
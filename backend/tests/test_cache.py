@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from core.cache import DiagramCache
+from core.processor import DataProcessor
+from core.tda import TopologyAnalyzer
+
+
+class TestDiagramCache:
+
+    def test_hit_returns_cached_diagrams(self):
+        cache = DiagramCache()
+        tda = TopologyAnalyzer(max_dimension=1, cache=cache)
+        points = np.random.default_rng(0).normal(size=(30, 2))
+
+        first = tda.compute_persistence(points)
+        second = tda.compute_persistence(points.copy())
+        assert second is first
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+        # Parameters are part of the key
+        TopologyAnalyzer(max_dimension=0, cache=cache).compute_persistence(points)
+        assert cache.stats()["misses"] == 2
+
+    @pytest.mark.asyncio
+    async def test_replayed_stream_hits_cache(self):
+        # Default (Rips) engine, whose point cloud includes the jitter column: the same seed and
+        # stream position give the same jitter, in batches or one event at a time
+        cache = DiagramCache()
+        values = np.sin(np.arange(30) / 4)
+        results = []
+        for _ in range(2):
+            processor = DataProcessor(window_size=20, cache=cache)
+            processor.ingest_many(values[:25])
+            for value in values[25:]:
+                processor.ingest({"value": value})
+            results.append(await processor.process_window(force=True))
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+        assert results[0]["betti_numbers"] == results[1]["betti_numbers"]
+
+    def test_derived_features_are_memoized(self):
+        cache = DiagramCache()
+        tda = TopologyAnalyzer(max_dimension=1, cache=cache)
+        diagrams = tda.compute_persistence(np.random.default_rng(1).normal(size=(30, 2)))
+
+        landscape = tda.compute_persistence_landscape(diagrams)
+        assert tda.compute_persistence_landscape(diagrams) is landscape
+        assert tda.compute_persistence_landscape(diagrams, resolution=10) is not landscape
+        assert tda.extract_betti_numbers(diagrams) == tda.extract_betti_numbers(list(diagrams))
+        assert len(cache.features(diagrams)) == 3
+        assert cache.features(list(diagrams)) is None
+
+    def test_lru_eviction_by_count_and_bytes(self):
+        dgms = [np.zeros((10, 2))]
+        cache = DiagramCache(max_entries=2)
+        cache.put("a", list(dgms))
+        cache.put("b", list(dgms))
+        cache.get("a")
+        cache.put("c", list(dgms))
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.evictions == 1
+
+        small = DiagramCache(max_bytes=1000)
+        small.put("a", [np.zeros((20, 2))])
+        small.put("b", [np.zeros((20, 2))])
+        assert len(small) == 1 and small.nbytes <= 1000
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import pytest
+import numpy as np
+from core.executor import AnalysisExecutor, AnalysisOverloaded
+from core.processor import DataProcessor
+
+
+class TestAnalysisExecutor:
+
+    @pytest.mark.asyncio
+    async def test_rejects_beyond_capacity(self):
+        executor = AnalysisExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+        try:
+            running = asyncio.ensure_future(executor.run(release.wait))
+            queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+            await asyncio.sleep(0.05)
+            assert executor.running == 1 and executor.queue_depth == 1
+
+            with pytest.raises(AnalysisOverloaded):
+                await executor.run(lambda: "rejected")
+            assert executor.rejected == 1
+
+            release.set()
+            assert await running is True
+            assert await queued == "queued"
+            assert executor.stats()["completed"] == 2
+        finally:
+            release.set()
+            executor.shutdown()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("kind", ["thread", "process"])
+    async def test_processor_offloads_analysis(self, kind):
+        executor = AnalysisExecutor(kind=kind, max_workers=1)
+        try:
+            processor = DataProcessor(window_size=20, executor=executor)
+            for i in range(25):
+                processor.ingest({"value": np.sin(i / 10)})
+            # Calibration trains in the background instead of inside ingest()
+            assert not processor.is_calibrated
+
+            result = await processor.process_window()
+            assert processor.is_calibrated and processor.ml.is_fitted
+            assert set(result["betti_numbers"]) == {"h0", "h1", "h2"}
+            assert result["window_size"] == 20
+            # A thread executor ran the calibration too; a process pool can't hold the models
+            assert executor.completed == (2 if kind == "thread" else 1)
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_process_mode_uses_cache_and_cost_model(self):
+        from core.cache import DiagramCache
+        executor = AnalysisExecutor(kind="process", max_workers=1)
+        cache = DiagramCache()
+        values = np.sin(np.arange(20) / 10)
+        try:
+            processors = []
+            for _ in range(2):
+                processor = DataProcessor(window_size=20, executor=executor, cache=cache, latency_budget_ms=60000)
+                processor.ingest_many(values)
+                result = await processor.process_window()
+                assert result["topology_features"]["degradation"]["level"] == 0
+                processors.append(processor)
+        finally:
+            executor.shutdown()
+
+        # The second window was served from the cache without a trip to the pool
+        assert executor.completed == 1
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+        # The pool's timing came back into the first processor's cost model
+        assert (2, False) in processors[0].tda.cost_model.coefficients
+        assert not processors[1].tda.cost_model.coefficients
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+from core.forest import CompiledForest, average_path_length
+from core.ml import AnomalyDetector
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"max_features": 0.5},
+    {"max_samples": 2},
+    {"max_samples": 1},
+    {"n_estimators": 7, "contamination": "auto"}
+])
+def test_compiled_forest_matches_sklearn(options):
+    rng = np.random.default_rng(0)
+    train = rng.normal(0, 1, (300, 4))
+    forest = IsolationForest(random_state=42, **{"contamination": 0.1, **options}).fit(train)
+    compiled = CompiledForest.from_sklearn(forest)
+
+    points = np.vstack((train, rng.normal(0, 3, (200, 4)), [[50.0, -50.0, 0.0, 1e6]]))
+    np.testing.assert_allclose(compiled.score_samples(points), forest.score_samples(points), rtol=0, atol=1e-12)
+    np.testing.assert_allclose(compiled.decision_function(points), forest.decision_function(points),
+                               rtol=0, atol=1e-12)
+    assert compiled.leaves(points[:1]).shape == (1, len(forest.estimators_))
+
+
+def test_average_path_length():
+    assert list(average_path_length([0, 1, 2])) == [0.0, 0.0, 1.0]
+    n = 256.0
+    assert average_path_length([n])[0] == pytest.approx(2 * (np.log(n - 1) + np.euler_gamma) - 2 * (n - 1) / n)
+
+
+def test_detector_scores_through_compiled_forest():
+    rng = np.random.default_rng(1)
+    detector = AnomalyDetector(use_autoencoder=False)
+    detector.train(rng.normal(0, 1, (50, 2)))
+    assert detector._compiled_forest is not None
+
+    points = np.vstack((rng.normal(0, 1, (10, 2)), [[10.0, 10.0]]))
+    severity, is_anomaly = detector.predict_many(points)
+    np.testing.assert_allclose(severity, -detector.iso_forest.decision_function(points), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(is_anomaly, detector.iso_forest.predict(points) == -1)
+
+    # Restored detectors export the forest again once it is checked against recent points
+    restored = AnomalyDetector(use_autoencoder=False)
+    restored.set_state(detector.get_state())
+    assert restored._compiled_forest is None
+    restored.set_state(detector.get_state(), points)
+    assert restored._compiled_forest is not None
+    np.testing.assert_array_equal(restored.predict_many(points)[0], severity)
+
+
+@pytest.mark.parametrize("bad", [np.nan, np.inf, 1e300])
+def test_compiled_forest_rejects_non_finite_input(bad):
+    forest = IsolationForest(n_estimators=5, random_state=0).fit(np.random.default_rng(0).normal(size=(50, 2)))
+    compiled = CompiledForest.from_sklearn(forest)
+    with pytest.raises(ValueError):
+        compiled.decision_function([[0.0, bad]])
+
+    # The detector scores such points through sklearn instead
+    detector = AnomalyDetector(use_autoencoder=False)
+    detector.train(np.random.default_rng(0).normal(size=(50, 2)))
+    severity, _ = detector.predict_many([[0.0, bad]])
+    np.testing.assert_allclose(severity, -detector.iso_forest.decision_function([[0.0, bad]]))
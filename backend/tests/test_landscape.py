@@ -44,3 +44,34 @@ class TestPersistenceLandscape:
         res = tda.compute_persistence_landscape(dgm, resolution=20)
         
         assert max(res["y"]) > 1.5 # Should be close to 2.0
+
+    def test_landscape_layers_match_reference(self):
+        tda = TopologyAnalyzer()
+        dgm = [
+            np.array([[0, 0.5], [0, 1.5], [0, np.inf]]),
+            np.array([[1, 5], [2, 4], [2.5, 3.5]]),
+            np.array([[3, 4]])
+        ]
+        grid, layers = tda.compute_landscape_layers(dgm, num_layers=4, resolution=50)
+
+        assert set(layers) == {0, 1, 2}
+        for dim, vals in layers.items():
+            assert vals.shape == (4, 50)
+            # Reference: sorted tent values at every grid point
+            bars = dgm[dim][np.isfinite(dgm[dim][:, 1])]
+            tents = np.array([[max(0, min(t - b, d - t)) for b, d in bars] for t in grid])
+            expected = -np.sort(-tents, axis=1)
+            padded = np.zeros((50, 4))
+            padded[:, :min(4, len(bars))] = expected[:, :4]
+            np.testing.assert_allclose(vals, padded.T)
+
+    def test_landscapes_shared_grid_output(self):
+        tda = TopologyAnalyzer()
+        assert tda.compute_persistence_landscapes([]) == {"x": [], "layers": {}}
+
+        dgm = [np.array([[0, 1], [0, np.inf]]), np.array([[1, 3]])]
+        res = tda.compute_persistence_landscapes(dgm, num_layers=2, resolution=10)
+        assert len(res["x"]) == 10
+        assert set(res["layers"]) == {"h0", "h1"}
+        assert len(res["layers"]["h1"]) == 2
+        assert max(res["layers"]["h1"][1]) == 0.0  # Only one H1 bar
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+from core.lazy import import_report, lazy_import, preload
+
+
+class TestLazyImports:
+
+    def test_imports_on_first_attribute_access(self):
+        sys.modules.pop("wave", None)
+        wave = lazy_import("wave")
+        assert "wave" not in sys.modules
+        assert wave.Error is sys.modules["wave"].Error
+        assert "wave" in dict(import_report(top=100))
+
+    def test_preload_in_background(self):
+        sys.modules.pop("colorsys", None)
+        preload(["colorsys", "no_such_module_xyz"]).join()
+        assert "colorsys" in sys.modules
+
+    def test_pipeline_import_leaves_heavy_libraries_unloaded(self):
+        code = (
+            "import sys, core.processor, core.registry\n"
+            "heavy = [m for m in ('torch', 'sklearn', 'ripser', 'pandas', 'persim', 'scipy') if m in sys.modules]\n"
+            "print(','.join(heavy))"
+        )
+        backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                   cwd=backend)
+        assert completed.stdout.strip() == ""
+
+
+def test_torch_threads_configured_once_from_env(monkeypatch):
+    from unittest.mock import MagicMock
+    from core import ml
+    fake_torch = MagicMock()
+    monkeypatch.setattr(ml, "torch", fake_torch)
+    monkeypatch.setattr(ml, "_torch_threads_configured", False)
+    monkeypatch.setenv("TOPOFORGE_TORCH_THREADS", "1")
+
+    ml.configure_torch_threads()
+    ml.configure_torch_threads()
+    fake_torch.set_num_threads.assert_called_once_with(1)
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from database.writer import AnomalyLogWriter
+
+
+class FakeLogModel:
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def create_logs(self, logs):
+        if self.fail:
+            raise RuntimeError("write failed")
+        self.batches.append(list(logs))
+        return len(logs)
+
+
+class TestAnomalyLogWriter:
+
+    @pytest.mark.asyncio
+    async def test_flushes_by_size_and_time(self):
+        model = FakeLogModel()
+        writer = AnomalyLogWriter(model=model, batch_size=3, flush_interval_s=0.05)
+        writer.start()
+        try:
+            for i in range(4):
+                writer.submit({"i": i})
+            await asyncio.sleep(0.02)
+            assert [len(b) for b in model.batches] == [3]  # size-triggered
+
+            await asyncio.sleep(0.1)
+            assert [len(b) for b in model.batches] == [3, 1]  # time-triggered
+        finally:
+            await writer.stop()
+        stats = writer.stats()
+        assert stats["written"] == 4 and stats["batches"] == 2 and stats["max_lag_ms"] > 0
+
+    @pytest.mark.asyncio
+    async def test_drops_when_full_and_flushes_on_stop(self):
+        model = FakeLogModel()
+        writer = AnomalyLogWriter(model=model, max_queue=2, batch_size=10)
+        assert writer.submit({"i": 0}) and writer.submit({"i": 1})
+        assert not writer.submit({"i": 2})
+        await writer.stop()
+        assert writer.dropped == 1 and writer.written == 2
+
+    @pytest.mark.asyncio
+    async def test_counts_failures(self):
+        writer = AnomalyLogWriter(model=FakeLogModel(fail=True))
+        writer.submit({"i": 0})
+        await writer.stop()
+        assert writer.failed == 1 and writer.written == 0
+
+    @pytest.mark.asyncio
+    async def test_processor_queues_anomalies(self):
+        import numpy as np
+        from core.processor import DataProcessor
+
+        model = FakeLogModel()
+        writer = AnomalyLogWriter(model=model)
+        processor = DataProcessor(window_size=20, engine="sublevel", log_writer=writer)
+        processor.update_config({"anomaly_threshold": 0})
+        processor.ingest_many(np.sin(np.arange(20) / 3))
+        result = await processor.process_window()
+        assert result["is_anomaly"] and writer.queue_depth == 1
+
+        await writer.stop()
+        assert model.batches[0][0]["anomaly_score"] == result["anomaly_score"]
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from core.metrics import MetricsRegistry, Histogram, metrics
+from core.processor import DataProcessor
+
+
+class TestMetrics:
+
+    def test_histogram_quantiles(self):
+        histogram = Histogram((1, 2, 4, 8))
+        for value in [0.5] * 50 + [3] * 49 + [100]:
+            histogram.observe(value)
+        assert histogram.count == 100 and histogram.counts == [50, 0, 49, 0, 1]
+        assert 0 < histogram.quantile(0.5) <= 1
+        assert 2 < histogram.quantile(0.99) <= 4
+
+    def test_render_prometheus_text(self):
+        registry = MetricsRegistry()
+        registry.describe("demo_seconds", "Demo", buckets=(0.1, 1))
+        registry.observe("demo_seconds", 0.5, stage="a")
+        registry.inc("demo_total", 2)
+        registry.register_collector(lambda: [("demo_gauge", 3, {"k": 'x"y'})])
+        text = registry.render()
+        assert "# TYPE demo_seconds histogram" in text
+        assert 'demo_seconds_bucket{stage="a",le="0.1"} 0' in text
+        assert 'demo_seconds_bucket{stage="a",le="+Inf"} 1' in text
+        assert 'demo_seconds_count{stage="a"} 1' in text
+        assert "demo_total 2" in text
+        assert 'demo_gauge{k="x\\"y"} 3' in text
+
+    @pytest.mark.asyncio
+    async def test_processor_records_stages(self):
+        metrics.reset()
+        processor = DataProcessor(window_size=20, engine="sublevel")
+        processor.ingest_many(np.sin(np.arange(20) / 3))
+        await processor.process_window()
+        stages = metrics.quantiles("topoforge_stage_seconds")
+        for stage in ("persistence", "summary", "landscape", "ml", "security", "analysis", "window"):
+            assert f"stage={stage}" in stages
+        assert 'topoforge_windows_total{evaluated="true"} 1' in metrics.render()
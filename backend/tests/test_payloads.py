@@ -0,0 +1,57 @@
+import json
+import numpy as np
+import pytest
+from core.payloads import parse_event_batch, PayloadError
+from core.processor import DataProcessor
+
+
+class TestBatchPayloads:
+
+    def test_layouts(self):
+        events = [{"value": 1, "timestamp": "t1"}, {"value": 2.5, "timestamp": "t2"}]
+
+        ndjson = "\n".join(json.dumps(e) for e in events).encode() + b"\n"
+        values, timestamps = parse_event_batch(ndjson, "application/x-ndjson; charset=utf-8")
+        np.testing.assert_array_equal(values, [1.0, 2.5])
+        assert timestamps == ["t1", "t2"]
+
+        values, timestamps = parse_event_batch(json.dumps(events).encode(), "application/json")
+        np.testing.assert_array_equal(values, [1.0, 2.5])
+
+        columnar = json.dumps({"value": [1, 2, 3]}).encode()
+        values, timestamps = parse_event_batch(columnar, "application/json")
+        assert values.dtype == np.float64 and values.tolist() == [1.0, 2.0, 3.0]
+        assert timestamps is None
+
+    @pytest.mark.parametrize("body", [
+        b"{not json",
+        b'{"value": 3}',
+        b'{"value": [1, 2], "timestamp": ["t1"]}',
+        b'{"value": ["a"]}',
+        b"[1, 2]",
+        b'{"value": [1, 2], "timestamp": 5}',
+        b'{"value": [1, null]}',
+        b'{"value": [1, 1e400]}',
+        b'[{"value": null}]',
+        b'[{"value": "NaN"}]',
+    ])
+    def test_rejects_malformed(self, body):
+        with pytest.raises(PayloadError):
+            parse_event_batch(body, "application/json")
+
+    @pytest.mark.asyncio
+    async def test_one_result_per_hop(self):
+        processor = DataProcessor(window_size=20, engine="sublevel")
+        results = await processor.ingest_batch(np.sin(np.arange(100) / 7), hop=25)
+        assert len(results) == 4
+        assert all(r["evaluated"] and r["events_since_eval"] == 25 for r in results)
+
+    @pytest.mark.asyncio
+    async def test_batch_without_hop_is_analyzed_once(self):
+        processor = DataProcessor(window_size=20, engine="sublevel")
+        results = await processor.ingest_batch(np.sin(np.arange(100) / 7))
+        assert len(results) == 1 and results[0]["events_since_eval"] == 100
+        assert await processor.ingest_batch([]) == []
+
+        processor.update_config({"batch_hop": 10})
+        assert len(await processor.ingest_batch(np.sin(np.arange(30) / 7))) == 3
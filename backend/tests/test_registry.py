@@ -0,0 +1,52 @@
+import pytest
+from core.registry import ProcessorRegistry, DEFAULT_STREAM
+
+
+class TestProcessorRegistry:
+
+    def test_streams_are_isolated(self):
+        registry = ProcessorRegistry(window_size=20)
+        a, b = registry.get("a"), registry.get("b")
+        assert a is not b and registry.get("a") is a
+        assert registry.get(None) is registry.get(DEFAULT_STREAM)
+
+        for i in range(5):
+            a.ingest({"value": i})
+        assert len(a.event_buffer) == 5 and len(b.event_buffer) == 0
+
+    def test_lru_eviction_keeps_config(self):
+        registry = ProcessorRegistry(max_streams=2, default_config={"hop_size": 4}, window_size=20)
+        registry.configure("a", {"anomaly_threshold": 80})
+        registry.get("b")
+        registry.get("a")  # "b" is now least recently used
+        registry.get("c")
+        assert "b" not in registry and "a" in registry and len(registry) == 2
+        assert registry.evictions == 1
+
+        registry.get("d")  # evicts "a"; its config comes back with it
+        restored = registry.get("a")
+        assert restored.config["anomaly_threshold"] == 80.0
+        assert restored.config["hop_size"] == 4
+
+    def test_remembered_configs_are_bounded(self):
+        registry = ProcessorRegistry(max_streams=2, window_size=20)
+        for i in range(10):
+            registry.configure(f"s{i}", {"anomaly_threshold": 50 + i})
+        # The live streams keep theirs; older configs of evicted streams are forgotten
+        assert list(registry._configs) == ["s8", "s9"]
+        assert registry.get("s0").config["anomaly_threshold"] == 65.0
+
+        registry.configure("a", {"hop_size": 3})
+        registry.get("b")
+        assert "a" in registry._configs and "s8" not in registry._configs
+
+    def test_idle_ttl(self):
+        registry = ProcessorRegistry(idle_ttl_s=10, window_size=20)
+        registry.get("a")
+        registry.get("b")
+        assert registry.evict_idle(now=registry._processors["b"][1] + 11) == 2
+        assert len(registry) == 0
+
+    def test_rejects_empty_bound(self):
+        with pytest.raises(ValueError):
+            ProcessorRegistry(max_streams=0)
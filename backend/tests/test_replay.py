@@ -0,0 +1,72 @@
+import csv
+import json
+import numpy as np
+import pytest
+from scripts.replay_events import main
+
+
+class TestReplayCli:
+
+    def test_replays_jsonl_and_csv_per_source(self, tmp_path):
+        values = np.sin(np.arange(60) / 5)
+        jsonl = tmp_path / "events.jsonl"
+        with open(jsonl, "w") as handle:
+            for i, value in enumerate(values):
+                handle.write(json.dumps({"source_id": "a", "value": value, "timestamp": f"a{i}"}) + "\n")
+                handle.write(json.dumps({"source_id": "b", "value": -value, "timestamp": f"b{i}"}) + "\n")
+        csv_path = tmp_path / "events.csv"
+        with open(csv_path, "w", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=["source_id", "value", "timestamp"])
+            writer.writeheader()
+            writer.writerows({"source_id": "c", "value": v, "timestamp": f"c{i}"} for i, v in enumerate(values))
+
+        output = tmp_path / "scores.jsonl"
+        main([str(jsonl), str(csv_path), "-o", str(output), "--workers", "0", "--engine", "sublevel",
+              "--window-size", "20", "--hop", "10", "--chunk-size", "25"])
+
+        rows = [json.loads(line) for line in open(output)]
+        by_source = {}
+        for row in rows:
+            by_source.setdefault(row["source_id"], []).append(row)
+        assert set(by_source) == {"a", "b", "c"}
+        for source_id, source_rows in by_source.items():
+            # Buffering ends at 10 events, then one window per hop of 10
+            assert [r["event_index"] for r in source_rows] == [9, 19, 29, 39, 49, 59]
+            assert [r["event_timestamp"] for r in source_rows] == [f"{source_id}{i}" for i in range(9, 60, 10)]
+
+    def test_skips_missing_and_non_finite_values(self, tmp_path, caplog):
+        values = np.sin(np.arange(40) / 5)
+        events = tmp_path / "events.jsonl"
+        with open(events, "w") as handle:
+            for i, value in enumerate(values):
+                handle.write(json.dumps({"source_id": "a", "value": value}) + "\n")
+                if i == 25:
+                    for bad in (float("nan"), "inf", None, ""):
+                        handle.write(json.dumps({"source_id": "a", "value": bad}) + "\n")
+                    handle.write(json.dumps({"source_id": "a"}) + "\n")
+
+        output = tmp_path / "scores.jsonl"
+        with caplog.at_level("WARNING", logger="topoforge.replay"):
+            main([str(events), "-o", str(output), "--workers", "0", "--engine", "sublevel",
+                  "--window-size", "20", "--hop", "10"])
+
+        rows = [json.loads(line) for line in open(output)]
+        # The bad events are dropped, not read as 0 or NaN
+        assert [r["event_index"] for r in rows] == [9, 19, 29, 39]
+        assert "Skipped 5 events" in caplog.text
+
+    def test_parquet_schema_is_fixed(self, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        values = np.sin(np.arange(40) / 5)
+        events = tmp_path / "events.jsonl"
+        with open(events, "w") as handle:
+            for i, value in enumerate(values):
+                # No timestamps in the first chunk
+                event = {"source_id": "a", "value": value, "timestamp": f"t{i}" if i >= 20 else None}
+                handle.write(json.dumps(event) + "\n")
+
+        output = tmp_path / "scores.parquet"
+        main([str(events), "-o", str(output), "--workers", "0", "--engine", "sublevel",
+              "--window-size", "20", "--hop", "10", "--chunk-size", "20"])
+        table = pq.read_table(output)
+        assert table.column("event_timestamp").to_pylist() == [None, None, "t29", "t39"]
@@ -1,6 +1,6 @@
 import pytest
 import numpy as np
-from core.tda import TopologyAnalyzer
+from core.tda import TopologyAnalyzer, DiagramSummary
 from core.processor import DataProcessor
 from unittest.mock import MagicMock, patch
 
@@ -25,6 +25,24 @@ class TestAnomalyScoring:
         entropy = tda.compute_persistence_entropy(dgm)
         assert abs(entropy - np.log(2)) < 0.001
 
+    def test_summary_matches_individual_features(self):
+        tda = TopologyAnalyzer()
+        rng = np.random.default_rng(0)
+        diagrams = tda.compute_persistence(rng.normal(size=(40, 3)))
+        diagrams.append(np.empty((0, 2)))  # Empty dimension
+
+        summary = tda.summarize_diagrams(diagrams, thresholds=(0.1, 0.3))
+        assert summary.betti[0.1] == tda.extract_betti_numbers(diagrams, threshold=0.1)
+        assert summary.betti[0.3] == tda.extract_betti_numbers(diagrams, threshold=0.3)
+        assert summary.adaptive_betti == tda.extract_betti_numbers(diagrams, adaptive=True)
+        assert summary.entropy == pytest.approx(tda.compute_persistence_entropy(diagrams))
+        assert summary.total_lifetime == pytest.approx(tda.compute_total_lifetime(diagrams))
+        lifetimes = np.concatenate([d[:, 1] - d[:, 0] for d in diagrams])
+        assert summary.max_lifetime == pytest.approx(np.max(lifetimes[np.isfinite(lifetimes)]))
+
+        empty = tda.summarize_diagrams([])
+        assert empty.betti_numbers == {} and empty.entropy == 0.0
+
     @pytest.mark.asyncio
     async def test_processor_scoring(self):
         # Mock dependencies
@@ -45,11 +63,20 @@ class TestAnomalyScoring:
             # Weighted: 0.4*80 + 0.3*60 + 0.3*100 = 32 + 18 + 30 = 80.0
             
             mock_tda.compute_persistence.return_value = []
-            mock_tda.extract_betti_numbers.return_value = {"h0": 2, "h1": 2, "h2": 1}
-            mock_tda.compute_persistence_entropy.return_value = 3.0
-            mock_tda.compute_total_lifetime.return_value = 100.0
+            # Full-budget run
+            mock_tda.last_approximation = mock_tda.last_degradation = None
+            mock_tda.summarize_diagrams.return_value = DiagramSummary(
+                thresholds=(0.1,),
+                betti={0.1: {"h0": 2, "h1": 2, "h2": 1}},
+                adaptive_thresholds={},
+                adaptive_betti={},
+                entropy=3.0,
+                total_lifetime=100.0,
+                max_lifetime=10.0,
+                max_lifetimes={}
+            )
             
-            mock_ml.predict.return_value = {"severity": 0.8, "is_anomaly": True}
+            mock_ml.predict_many.return_value = (np.array([0.8]), np.array([True]))
             mock_security.classify.return_value = {"level": "critical"}
             
             # Initialize processor
@@ -68,3 +95,17 @@ class TestAnomalyScoring:
             assert scores["ml"] == 100.0
             assert scores["total"] == 80.0
             assert result["is_anomaly"] is True
+
+    def test_degraded_window_is_scored_by_ml_alone(self):
+        processor = DataProcessor(window_size=200, latency_budget_ms=60000)
+        processor.ingest_many(np.sin(np.arange(200) / 10))
+        data = processor.event_buffer.view()
+        diagrams = processor.tda.compute_persistence(data)
+
+        full = processor._analyze_window(data, (diagrams, None, {"level": 0}))
+        assert full["scores"]["weights"]["betti"] == 0.4
+        # A 10-point subsample splits the cloud into many components
+        degraded = processor._analyze_window(data, (processor.tda.compute_persistence(data[::20]), None, {"level": 3}))
+        assert degraded["betti_numbers"]["h0"] > full["betti_numbers"]["h0"]
+        assert degraded["scores"]["weights"] == {"betti": 0.0, "entropy": 0.0, "ml": 1.0}
+        assert degraded["anomaly_score"] == pytest.approx(degraded["scores"]["ml"])
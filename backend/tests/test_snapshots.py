@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from core.processor import DataProcessor
+from core.registry import ProcessorRegistry
+from core.snapshots import read_snapshot, write_snapshot
+
+
+def _feed(processor, values):
+    for value in values:
+        processor.ingest({"value": value})
+
+
+class TestSnapshots:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("engine", ["rips", "incremental"])
+    async def test_restored_processor_scores_like_the_original(self, engine):
+        values = np.sin(np.arange(80) / 4)
+        original = DataProcessor(window_size=30, engine=engine)
+        original.update_config({"anomaly_threshold": 50, "hop_size": 5})
+        _feed(original, values[:60])
+        await original.process_window()
+
+        restored = DataProcessor(window_size=30, engine=engine)
+        restored.restore(original.snapshot())
+        assert restored.is_calibrated and restored.config["hop_size"] == 5
+        assert len(restored.event_buffer) == 30
+
+        np.testing.assert_array_equal(restored.event_buffer.view(), original.event_buffer.view())
+        point = original.event_buffer.view()[-1:].copy()
+        assert restored.ml.predict(point) == original.ml.predict(point)
+
+        _feed(restored, values[60:65])
+        result = await restored.process_window()
+        assert result["evaluated"] and result["events_since_eval"] == 5
+
+    def test_rejects_mismatched_window(self):
+        state = DataProcessor(window_size=30).snapshot()
+        with pytest.raises(ValueError):
+            DataProcessor(window_size=20).restore(state)
+
+    def test_registry_round_trip_through_disk(self, tmp_path):
+        registry = ProcessorRegistry(window_size=20, engine="sublevel")
+        registry.configure("a", {"anomaly_threshold": 80})
+        _feed(registry.get("b"), range(25))
+        path = str(tmp_path / "state" / "processors.snapshot")
+        write_snapshot(path, registry.snapshot())
+
+        fresh = ProcessorRegistry(window_size=20, engine="sublevel")
+        assert fresh.restore(read_snapshot(path)) == 2
+        assert fresh.get("a").config["anomaly_threshold"] == 80.0
+        assert fresh.get("b").is_calibrated and len(fresh.get("b").event_buffer) == 20
+        assert list(tmp_path.joinpath("state").iterdir()) == [tmp_path / "state" / "processors.snapshot"]
+
+    def test_unreadable_snapshot_is_ignored(self, tmp_path):
+        path = tmp_path / "broken.snapshot"
+        path.write_bytes(b"not a snapshot")
+        assert read_snapshot(str(path)) is None
+        assert read_snapshot(str(tmp_path / "missing.snapshot")) is None
+
+    def test_model_state_is_detached_from_live_models(self):
+        from core.ml import AnomalyDetector
+        detector = AnomalyDetector(epochs=2)
+        detector.train(np.random.default_rng(0).normal(size=(40, 2)))
+        state = detector.get_state()
+        saved = {name: tensor.clone() for name, tensor in state["autoencoder"].items()}
+
+        # Retraining updates the live parameters in place
+        detector._train_autoencoder(np.random.default_rng(1).normal(5, 1, (40, 2)).astype(np.float32))
+        for name, tensor in state["autoencoder"].items():
+            assert tensor.equal(saved[name])
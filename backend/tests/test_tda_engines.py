@@ -0,0 +1,196 @@
+import pytest
+import numpy as np
+from ripser import ripser
+from core.tda import TopologyAnalyzer, RollingDistanceMatrix
+
+
+def _assert_same_diagrams(actual, expected):
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        a = a[np.lexsort((a[:, 1], a[:, 0]))]
+        e = e[np.lexsort((e[:, 1], e[:, 0]))]
+        np.testing.assert_allclose(a, e, atol=1e-9)
+
+
+class TestIncrementalEngine:
+
+    def test_rolling_matrix_matches_full_recompute(self):
+        rng = np.random.default_rng(0)
+        points = rng.normal(size=(35, 2))
+        rolling = RollingDistanceMatrix(window_size=20)
+        rolling.extend(points)
+
+        window = points[-20:]
+        expected = np.sqrt(((window[:, None, :] - window[None, :, :]) ** 2).sum(-1))
+        # Slots are written round-robin, map them back to the chronological window
+        slots = np.arange(35)[-20:] % 20
+        np.testing.assert_allclose(rolling.matrix()[np.ix_(slots, slots)], expected)
+        assert len(rolling) == 20
+
+    def test_incremental_diagrams_match_rips(self):
+        rng = np.random.default_rng(1)
+        points = rng.normal(size=(60, 2))
+        tda = TopologyAnalyzer(max_dimension=1, engine="incremental", window_size=25)
+        for p in points:
+            tda.update(p)
+
+        _assert_same_diagrams(tda.compute_persistence(), ripser(points[-25:], maxdim=1)['dgms'])
+
+    def test_stateless_engine_requires_points(self):
+        with pytest.raises(ValueError):
+            TopologyAnalyzer().compute_persistence()
+        with pytest.raises(ValueError):
+            TopologyAnalyzer(engine="unknown")
+
+
+class TestMSTEngine:
+
+    def test_sliding_window_h0_matches_rips(self):
+        rng = np.random.default_rng(2)
+        points = rng.normal(size=(120, 2))
+        points[50] = points[49]  # Duplicate point -> zero-length edge
+        tda = TopologyAnalyzer(engine="mst", window_size=30)
+        assert tda.max_dim == 0
+
+        for i, p in enumerate(points):
+            tda.update(p)
+            if i >= 5 and i % 7 == 0:
+                window = points[max(0, i - 29):i + 1]
+                _assert_same_diagrams(tda.compute_persistence(), ripser(window, maxdim=0)['dgms'])
+
+    def test_point_cloud_path_and_betti(self):
+        rng = np.random.default_rng(3)
+        points = np.vstack([rng.normal(0, 0.01, (20, 2)), rng.normal(5, 0.01, (20, 2))])
+        tda = TopologyAnalyzer(engine="mst")
+        diagrams = tda.compute_persistence(points)
+
+        _assert_same_diagrams(diagrams, ripser(points, maxdim=0)['dgms'])
+        assert tda.extract_betti_numbers(diagrams, threshold=1.0) == {"h0": 2}
+
+    def test_rejects_higher_dimensions(self):
+        with pytest.raises(ValueError):
+            TopologyAnalyzer(max_dimension=1, engine="mst")
+
+
+class TestSublevelEngine:
+
+    def test_known_sequence(self):
+        dgm = TopologyAnalyzer(engine="sublevel").compute_persistence(np.array([0.0, 3.0, 1.0, 4.0, 2.0]))[0]
+        assert dgm.tolist() == [[1.0, 3.0], [2.0, 4.0], [0.0, np.inf]]
+
+    def test_matches_lower_star_rips(self):
+        from scipy.sparse import coo_matrix
+        rng = np.random.default_rng(4)
+        values = np.cumsum(rng.normal(size=200))
+
+        # Lower-star filtration of the path graph, as in Ripser's time series example
+        n = len(values)
+        idx = np.arange(n - 1)
+        rows = np.concatenate([np.arange(n), idx])
+        cols = np.concatenate([np.arange(n), idx + 1])
+        data = np.concatenate([values, np.maximum(values[:-1], values[1:])])
+        expected = ripser(coo_matrix((data, (rows, cols)), shape=(n, n)), maxdim=0, distance_matrix=True)['dgms']
+
+        _assert_same_diagrams(TopologyAnalyzer(engine="sublevel").compute_persistence(values[:, None]), expected)
+
+    def test_superlevel_tracks_maxima(self):
+        values = np.array([0.0, 3.0, 1.0, 4.0, 2.0])
+        dgm = TopologyAnalyzer(engine="superlevel").compute_persistence(values)[0]
+        # Negated coordinates: the maximum 3 dies when it merges at 1
+        assert dgm.tolist() == [[-3.0, -1.0], [-4.0, np.inf]]
+
+    @pytest.mark.asyncio
+    async def test_processor_skips_jitter(self):
+        from core.processor import DataProcessor
+        processor = DataProcessor(window_size=20, engine="sublevel")
+        for i in range(20):
+            processor.ingest({"value": np.sin(i / 3)})
+        assert all(vector[1] == 0.0 for vector in processor.event_buffer)
+
+        result = await processor.process_window()
+        assert set(result["betti_numbers"]) == {"h0"}
+
+
+class TestLandmarkApproximation:
+
+    @pytest.mark.parametrize("method", ["greedy", "maxmin"])
+    def test_bound_holds(self, method):
+        from persim import bottleneck
+        rng = np.random.default_rng(5)
+        t = rng.uniform(0, 2 * np.pi, 400)
+        points = np.column_stack((np.cos(t), np.sin(t))) + rng.normal(0, 0.05, (400, 2))
+
+        tda = TopologyAnalyzer(max_dimension=1, n_landmarks=60, landmark_method=method)
+        approx = tda.compute_persistence(points)
+        info = tda.last_approximation
+
+        assert info["n_landmarks"] == 60 and info["n_points"] == 400
+        assert info["bottleneck_bound"] == 2 * info["cover_radius"]
+        exact = ripser(points, maxdim=1)['dgms']
+        assert bottleneck(exact[1], approx[1]) <= info["bottleneck_bound"] + 1e-9
+        assert tda.extract_betti_numbers(approx, threshold=0.5)["h1"] == 1
+
+    def test_small_windows_stay_exact(self):
+        tda = TopologyAnalyzer(max_dimension=1, n_landmarks=60)
+        tda.compute_persistence(np.random.default_rng(6).normal(size=(30, 2)))
+        assert tda.last_approximation is None
+
+    def test_incremental_engine_uses_landmarks(self):
+        tda = TopologyAnalyzer(max_dimension=1, engine="incremental", window_size=100,
+                               n_landmarks=40, landmark_method="maxmin")
+        for p in np.random.default_rng(7).normal(size=(100, 2)):
+            tda.update(p)
+        assert len(tda.compute_persistence()) == 2
+        assert tda.last_approximation["n_landmarks"] == 40
+
+
+class TestLatencyBudget:
+
+    def test_generous_budget_runs_full(self):
+        tda = TopologyAnalyzer(max_dimension=1, latency_budget_ms=60000)
+        diagrams = tda.compute_persistence(np.random.default_rng(8).normal(size=(40, 2)))
+        assert tda.last_degradation["level"] == 0
+        assert tda.last_degradation["name"] == "full"
+        assert len(diagrams) == 2
+
+    def test_tight_budget_degrades_and_keeps_dimensions(self):
+        tda = TopologyAnalyzer(max_dimension=2, latency_budget_ms=1)
+        diagrams = tda.compute_persistence(np.random.default_rng(9).normal(size=(500, 2)))
+        tag = tda.last_degradation
+
+        assert tag["name"] == "subsampled"
+        assert tag["maxdim"] == 1 and tag["thresh"] is not None
+        assert tag["n_used"] < 500
+        assert len(diagrams) == 3 and len(diagrams[2]) == 0
+        assert set(tda.extract_betti_numbers(diagrams)) == {"h0", "h1", "h2"}
+
+    def test_cost_model_follows_observations(self):
+        from core.tda import PersistenceCostModel
+        model = PersistenceCostModel(smoothing=1.0)
+        model.observe(100, 1, False, 0.5)
+        assert model.predict(100, 1) == pytest.approx(0.5)
+        assert model.predict(200, 1) == pytest.approx(2.0)
+        assert model.max_points(2.0, 1) == pytest.approx(200, abs=1)
+
+
+class TestPersistenceBatch:
+
+    def test_batch_matches_serial_in_order(self):
+        rng = np.random.default_rng(10)
+        windows = [rng.normal(size=(rng.integers(10, 40), 2)) for _ in range(9)]
+        tda = TopologyAnalyzer(max_dimension=1)
+
+        results = tda.compute_persistence_batch(windows, max_workers=2, chunk_size=2)
+        assert len(results) == len(windows)
+        for window, diagrams in zip(windows, results):
+            _assert_same_diagrams(diagrams, ripser(window, maxdim=1)['dgms'])
+
+    def test_reuses_executor_and_scalar_engine(self):
+        from concurrent.futures import ProcessPoolExecutor
+        tda = TopologyAnalyzer(engine="sublevel")
+        windows = [np.array([0.0, 3.0, 1.0, 4.0, 2.0]), np.array([1.0, 0.0, 1.0])]
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results = tda.compute_persistence_batch(windows, executor=pool, max_workers=1)
+        assert results[0][0].tolist() == [[1.0, 3.0], [2.0, 4.0], [0.0, np.inf]]
+        assert results[1][0].tolist() == [[0.0, np.inf]]
+        assert tda.compute_persistence_batch([]) == []
@@ -0,0 +1,62 @@
+import numpy as np
+from core.tda import TopologyAnalyzer, PersistenceVectorizer
+
+
+def _random_batch(n_windows, seed=0):
+    rng = np.random.default_rng(seed)
+    tda = TopologyAnalyzer(max_dimension=1)
+    batch = [tda.compute_persistence(rng.normal(size=(25, 2))) for _ in range(n_windows)]
+    batch.append([np.empty((0, 2)), np.empty((0, 2))])  # Window without finite bars
+    return batch
+
+
+class TestPersistenceVectorizer:
+
+    def test_betti_curves_match_naive_count(self):
+        batch = _random_batch(5)
+        vec = PersistenceVectorizer(dimensions=(0, 1), curve_resolution=30).fit(batch)
+        curves = vec.betti_curves(batch)
+
+        assert curves.shape == (6, 60) and curves.dtype == np.float32
+        for w, diagrams in enumerate(batch):
+            for slot, dgm in enumerate(diagrams):
+                # Essential bars (infinite death) are alive from their birth on
+                expected = [np.sum((dgm[:, 0] <= t) & (t < dgm[:, 1])) for t in vec.curve_grid]
+                np.testing.assert_array_equal(curves[w, slot * 30:(slot + 1) * 30], expected)
+
+    def test_h0_curve_counts_the_essential_class(self):
+        # Two clusters: two H0 classes until they merge, then the single essential one
+        points = np.vstack((np.zeros((5, 2)), np.full((5, 2), 10.0))) + np.linspace(0, 0.01, 10)[:, None]
+        diagrams = TopologyAnalyzer(max_dimension=0).compute_persistence(points)
+        vec = PersistenceVectorizer(dimensions=(0,), curve_resolution=50,
+                                    filtration_range=(0.0, 20.0)).fit([diagrams])
+        curve = vec.betti_curves([diagrams])[0]
+        assert curve[-1] == 1
+        assert curve[np.searchsorted(vec.curve_grid, 1.0)] == 2
+
+    def test_persistence_images_match_naive_sum(self):
+        batch = _random_batch(4, seed=1)
+        vec = PersistenceVectorizer(dimensions=(1,), image_resolution=8, max_chunk_bars=5).fit(batch)
+        images = vec.persistence_images(batch)
+
+        assert images.shape == (5, 64) and images.dtype == np.float32
+        assert not images[-1].any()
+        for w, diagrams in enumerate(batch[:-1]):
+            expected = np.zeros((8, 8))
+            for b, d in diagrams[1]:
+                p = d - b
+                weight = min(p / vec.persistence_range[1], 1.0) * vec._kernel_scale
+                gx = np.exp(-(vec.birth_centers - b) ** 2 / (2 * vec.sigma ** 2))
+                gy = np.exp(-(vec.persistence_centers - p) ** 2 / (2 * vec.sigma ** 2))
+                expected += weight * np.outer(gx, gy)
+            np.testing.assert_allclose(images[w], expected.ravel(), rtol=1e-4, atol=1e-6)
+
+    def test_analyzer_batch_api(self):
+        batch = _random_batch(3, seed=2)
+        tda = TopologyAnalyzer(max_dimension=1)
+        vec = PersistenceVectorizer(dimensions=(0, 1), curve_resolution=10, image_resolution=4).fit(batch)
+
+        assert tda.compute_betti_curves(batch, vec).shape == (4, 20)
+        assert tda.compute_persistence_images(batch, vec).shape == (4, 32)
+        assert vec.transform(batch).shape == (4, vec.n_features)
+        assert tda.compute_betti_curves(batch).shape == (4, 200)
@@ -0,0 +1,102 @@
+import asyncio
+import numpy as np
+import pytest
+from core.workers import HashRing, SharedValueRing, StreamWorkerPool
+
+
+class TestStreamWorkers:
+
+    def test_hash_ring_is_stable(self):
+        ring = HashRing(range(4))
+        keys = [f"source-{i}" for i in range(400)]
+        before = {key: ring.node_for(key) for key in keys}
+        assert set(before.values()) == {0, 1, 2, 3}
+        assert all(ring.node_for(key) == node for key, node in before.items())
+
+        ring.add(4)
+        moved = sum(ring.node_for(key) != node for key, node in before.items())
+        # Only keys taken over by the new node move
+        assert all(ring.node_for(key) in (node, 4) for key, node in before.items())
+        assert moved < len(keys) / 2
+
+    def test_shared_ring_wraps(self):
+        ring = SharedValueRing(8)
+        try:
+            ring.write(np.arange(6.0))
+            ring.release(6)
+            offset = ring.write(np.arange(10.0, 15.0))
+            assert offset == 6 and ring.in_use == 5
+            np.testing.assert_array_equal(ring.read(offset, 5), np.arange(10.0, 15.0))
+        finally:
+            ring.close(unlink=True)
+
+    @pytest.mark.asyncio
+    async def test_pool_matches_local_processing(self):
+        from core.processor import DataProcessor
+
+        values = np.sin(np.arange(60) / 5)
+        pool = StreamWorkerPool(n_workers=2, ring_capacity=256, window_size=20, engine="sublevel")
+        pool.start()
+        try:
+            await pool.configure("a", {"batch_hop": 20})
+            remote = await pool.process_batch("a", values)
+            single = await pool.process_events("b", values[:15])
+        finally:
+            pool.shutdown()
+
+        local = DataProcessor(window_size=20, engine="sublevel")
+        local.update_config({"batch_hop": 20})
+        expected = await local.ingest_batch(values)
+        assert len(remote) == len(expected) == 3
+        for got, want in zip(remote, expected):
+            assert got["betti_numbers"] == want["betti_numbers"]
+            assert got["topology_features"]["total_lifetime"] == pytest.approx(
+                want["topology_features"]["total_lifetime"])
+        assert single["evaluated"] is True
+        assert pool.stats()["workers"] == 2
+
+    @pytest.mark.asyncio
+    async def test_dead_worker_is_restarted(self):
+        pool = StreamWorkerPool(n_workers=2, ring_capacity=256, window_size=20, engine="sublevel")
+        pool.start()
+        try:
+            await pool.configure("a", {"batch_hop": 20})
+            worker = pool.worker_for("a")
+            crashed = pool._processes[worker]
+            crashed.kill()
+            crashed.join()
+
+            # Submitted to the dead worker: fails once the crash is noticed, and its values are released
+            with pytest.raises(RuntimeError, match="exited"):
+                await asyncio.wait_for(pool.process_batch("a", np.arange(40.0)), timeout=30)
+            stats = pool.stats()
+            assert stats["restarts"] == 1 and stats["alive"] == 2
+            assert stats["in_flight"] == [0, 0] and stats["pending"] == 0
+
+            # The replacement serves the shard again, with the stream's config replayed
+            results = await asyncio.wait_for(pool.process_batch("a", np.sin(np.arange(60) / 5)), timeout=60)
+            assert len(results) == 3
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_result_reader_survives_errors(self):
+        pool = StreamWorkerPool(n_workers=1, ring_capacity=256, window_size=20, engine="sublevel")
+        restart = pool._restart_dead_workers
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            restart()
+
+        pool._restart_dead_workers = flaky
+        pool.start()
+        try:
+            await asyncio.sleep(1.5)
+            assert len(calls) >= 2 and pool._reader.is_alive()
+            result = await asyncio.wait_for(pool.process_events("a", np.arange(20.0)), timeout=30)
+            assert result["evaluated"] is True
+        finally:
+            pool.shutdown()